@@ -0,0 +1 @@
+"""Benchmarks for the toolbox package; run each with ``python -m benchmarks.<name>``."""
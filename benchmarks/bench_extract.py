@@ -0,0 +1,82 @@
+"""Measure article extraction throughput over saved HTML fixtures.
+
+Compares a full ``html.parser`` parse of the whole page (the previous
+approach) with :mod:`toolbox.extract`'s partial read and strained parse.
+A multi-megabyte page is synthesised from the first fixture to show the
+effect of stopping early.
+
+Usage::
+
+    python -m benchmarks.bench_extract [--iterations 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from toolbox import extract
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+# fixture name -> URL it pretends to come from, which selects the site rule
+URLS = {
+    "aws_blog.html": "https://aws.amazon.com/blogs/aws/introducing-faster-inference-endpoints/",
+    "itmedia_news.html": "https://www.itmedia.co.jp/news/articles/2601/01/news001.html",
+    "generic_article.html": "https://news.example.com/2026/01/open-weight-model-benchmark",
+}
+
+
+def full_parse(data: bytes, url: str) -> tuple[str, str | None, list[str]]:
+    """Baseline: parse the whole document and walk it."""
+    soup = BeautifulSoup(data, "html.parser")
+    og = soup.find("meta", property="og:image")
+    paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+    return soup.title.get_text(strip=True), og and og.get("content"), paragraphs[:3]
+
+
+def fast_parse(data: bytes, url: str) -> extract.Extracted:
+    chunks = (data[i : i + extract.CHUNK_SIZE] for i in range(0, len(data), extract.CHUNK_SIZE))
+    partial, _ = extract.read_partial(chunks)
+    return extract.extract(partial, url)
+
+
+def throughput(func, data: bytes, url: str, iterations: int) -> float:
+    func(data, url)  # warm up caches and imports
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(data, url)
+    return iterations / (time.perf_counter() - start)
+
+
+def load_fixtures() -> list[tuple[str, bytes, str]]:
+    cases = [(path.name, path.read_bytes(), URLS[path.name]) for path in sorted(FIXTURES.glob("*.html"))]
+    name, data, url = next(c for c in cases if c[0] == "aws_blog.html")
+    # repeat the article body until the page is ~3 MiB, like long live-blog pages
+    body = re.search(rb"<section class=\"blog-post-content.*?</section>", data, re.S).group(0)
+    big = data.replace(body, body * (3 * 1024 * 1024 // len(body)))
+    cases.append(("aws_blog_3mib (synthetic)", big, url))
+    return cases
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    print(f"tree builder: {extract.tree_builder()}")
+    print(f"{'fixture':<28} {'KiB':>7} {'full art/s':>11} {'fast art/s':>11} {'speedup':>8}")
+    for name, data, url in load_fixtures():
+        iterations = max(1, args.iterations if len(data) < 1024 * 1024 else args.iterations // 10)
+        full = throughput(full_parse, data, url, iterations)
+        fast = throughput(fast_parse, data, url, iterations)
+        print(f"{name:<28} {len(data) / 1024:7.0f} {full:11.1f} {fast:11.1f} {fast / full:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+"""Upload report batches to a local Drive stub.
+
+Compares one-at-a-time with parallel resumable uploads, then shows that a
+re-run skips files already in the folder, that injected chunk failures are
+resumed rather than restarted, and that the cached OAuth token is refreshed
+once for all runs (the ``tokens`` column counts token requests per stub).
+
+Each case is checked against the stub: every file arrives intact (its MD5
+matches), the re-run uploads nothing, and the crashed upload resumes from
+the bytes the stub kept instead of starting over. The last case also fails
+the status queries Drive is asked after a failed chunk: the upload must
+keep its session across such failures and retry them. A failed check exits
+with status 1.
+
+Usage::
+
+    python -m benchmarks.bench_gdrive [--files 8] [--size-mib 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stubs import DriveStub
+from toolbox.gdrive import DriveError, DriveUploader, TokenCache, UploadResult, file_md5
+
+FOLDER = "folder-bench"
+CHUNK = 4 * 256 * 1024
+
+
+def make_files(directory: Path, count: int, size: int) -> list[Path]:
+    paths = []
+    for i in range(count):
+        path = directory / f"report-{i:02d}.pdf"
+        path.write_bytes(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def uploader(stub: DriveStub, tmp: Path, **kwargs) -> DriveUploader:
+    secret = tmp / "client_secret.json"
+    if not secret.exists():
+        secret.write_text(json.dumps({"installed": {"client_id": "id", "client_secret": "s", "token_uri": f"{stub.url}/token"}}))
+        # a refresh token from an earlier `python -m toolbox.gdrive auth`
+        (tmp / "token.json").write_text(json.dumps({"refresh_token": "1//refresh"}))
+    return DriveUploader(
+        TokenCache(secret, tmp / "token.json"),
+        api_url=f"{stub.url}/drive/v3",
+        upload_url=f"{stub.url}/upload/drive/v3",
+        chunk_size=CHUNK,
+        state_dir=tmp / "state",
+        **kwargs,
+    )
+
+
+def row(name: str, stub: DriveStub, results, wall: float, total: int) -> None:
+    uploaded = sum(1 for r in results if r.file_id and not r.skipped)
+    skipped = sum(r.skipped for r in results)
+    print(f"{name:<22} {wall:7.2f} {uploaded:9d} {skipped:8d} {stub.bytes_received / total:10.2f} {stub.token_requests:8d}")
+
+
+def check(name: str, stub: DriveStub, results: list[UploadResult], *, skipped: bool = False) -> list[str]:
+    """Problems with a case's results, if any."""
+    problems = []
+    for result in results:
+        stored = stub.files.get(result.file_id or "")
+        if result.error or stored is None:
+            problems.append(f"{name}: {result.path.name} not uploaded ({result.error})")
+        elif stored["md5Checksum"] != file_md5(result.path):
+            problems.append(f"{name}: {result.path.name} arrived corrupted")
+        elif result.skipped != skipped:
+            problems.append(f"{name}: {result.path.name} {'uploaded again' if skipped else 'wrongly skipped'}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--size-mib", type=float, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    size = int(args.size_mib * 1024 * 1024)
+    total = size * args.files
+    stub_kwargs = {"latency": 0.02, "bandwidth": 16 * 1024 * 1024}
+    print(f"{'case':<22} {'wall s':>7} {'uploaded':>9} {'skipped':>8} {'sent/size':>10} {'tokens':>8}")
+    problems: list[str] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        paths = make_files(tmp, args.files, size)
+
+        with DriveStub(**stub_kwargs) as stub:
+            start = time.perf_counter()
+            results = uploader(stub, tmp).upload_many(paths, FOLDER, workers=1)
+            row("serial", stub, results, time.perf_counter() - start, total)
+            problems += check("serial", stub, results)
+
+        with DriveStub(**stub_kwargs) as stub:
+            start = time.perf_counter()
+            results = uploader(stub, tmp).upload_many(paths, FOLDER, workers=args.workers)
+            row(f"parallel x{args.workers}", stub, results, time.perf_counter() - start, total)
+            problems += check("parallel", stub, results)
+            start = time.perf_counter()
+            results = uploader(stub, tmp).upload_many(paths, FOLDER, workers=args.workers)
+            row("re-run (dedup)", stub, results, time.perf_counter() - start, total)
+            problems += check("re-run", stub, results, skipped=True)
+
+        with DriveStub(fail_every=5, **stub_kwargs) as stub:
+            start = time.perf_counter()
+            results = uploader(stub, tmp).upload_many(paths, FOLDER, workers=args.workers)
+            row("flaky, resumed", stub, results, time.perf_counter() - start, total)
+            problems += check("flaky", stub, results)
+
+        # its own three-chunk file, so the second chunk fails whatever --size-mib is
+        crash = tmp / "crash.pdf"
+        crash.write_bytes(os.urandom(3 * CHUNK))
+        with DriveStub(fail_every=2, **stub_kwargs) as stub:
+            start = time.perf_counter()
+            try:
+                uploader(stub, tmp, max_retries=0).upload(crash, FOLDER)
+            except DriveError:
+                pass  # the "crashed" run leaves its session state behind
+            stub.fail_every = 0
+            sent_before = stub.bytes_received
+            result = uploader(stub, tmp).upload(crash, FOLDER)
+            row("crash, next run", stub, [result], time.perf_counter() - start, 3 * CHUNK)
+            print(f"{'':<22} resumed from byte {result.resumed_from} of {3 * CHUNK}")
+            problems += check("crash", stub, [result])
+            resent = stub.bytes_received - sent_before
+            if not result.resumed_from or resent != 3 * CHUNK - result.resumed_from:
+                problems.append(f"crash: next run sent {resent} bytes after resuming from {result.resumed_from}")
+
+        # the second chunk fails and so does the status query after it; the
+        # next run's first query fails too and must be retried, not restarted
+        lost = tmp / "lost.pdf"
+        lost.write_bytes(os.urandom(3 * CHUNK))
+        with DriveStub(fail_every=2, fail_status_every=1, **stub_kwargs) as stub:
+            start = time.perf_counter()
+            try:
+                uploader(stub, tmp, max_retries=1).upload(lost, FOLDER)
+                problems.append("status lost: upload succeeded without a status answer")
+            except DriveError:
+                pass
+            stub.fail_every, stub.fail_status_every = 0, 2
+            result = uploader(stub, tmp).upload(lost, FOLDER)
+            row("status lost, retried", stub, [result], time.perf_counter() - start, 3 * CHUNK)
+            problems += check("status lost", stub, [result])
+            if result.resumed_from != CHUNK + CHUNK // 2:
+                problems.append(f"status lost: resumed from {result.resumed_from}, not {CHUNK + CHUNK // 2}")
+    for problem in problems:
+        print(f"check failed: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""Send a report to a distribution list through a local SMTP stand-in.
+
+The per-message mode reconnects, logs in and re-encodes the attachment for
+every recipient, like ``/report-email`` did; the pooled mode uses
+:func:`toolbox.mailer.send_bulk`. A third case has the server drop
+connections to show reconnects. The stub's ``--handshake-ms`` delay stands
+in for the STARTTLS and AUTH round trips the stub itself skips.
+
+Every case is checked: each recipient gets exactly one message, the pool
+opens no more connections than its size plus recycling needs, and with
+drops the pool reconnects instead of losing messages. A failed check exits
+with status 1.
+
+Usage::
+
+    python -m benchmarks.bench_mailer [--recipients 200] [--attachment-kib 512]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stubs import SMTPStub
+from toolbox.mailer import SMTPPool, attachment_part, build_message, send_bulk
+
+SENDER = "Claude AI <bench@example.com>"
+MAX_MESSAGES = 50
+
+
+def per_message(stub: SMTPStub, recipients: list[str], pdf: Path) -> int:
+    for recipient in recipients:
+        msg = build_message(SENDER, recipient, "Daily digest", "See attached.", [attachment_part(pdf)])
+        with smtplib.SMTP("127.0.0.1", stub.port) as smtp:
+            smtp.login("bench@example.com", "secret")
+            smtp.send_message(msg)
+    return len(recipients)
+
+
+def pooled(stub: SMTPStub, recipients: list[str], pdf: Path, size: int) -> int:
+    pool = SMTPPool(
+        "127.0.0.1",
+        stub.port,
+        "bench@example.com",
+        "secret",
+        size=size,
+        max_messages=MAX_MESSAGES,
+        starttls=False,
+    )
+    with pool:
+        result = send_bulk(pool, SENDER, recipients, "Daily digest", "See attached.", [pdf])
+    return result.sent
+
+
+def check(
+    name: str, stub: SMTPStub, recipients: list[str], max_connections: int, min_connections: int = 0
+) -> list[str]:
+    """Problems with what a case delivered, if any."""
+    problems = []
+    delivered = sorted(r.strip("<>") for _, rcpts, _ in stub.messages for r in rcpts)
+    if delivered != sorted(recipients):
+        problems.append(f"{name}: {len(delivered)} deliveries for {len(recipients)} recipients, not one each")
+    if not min_connections <= stub.connections <= max_connections:
+        problems.append(
+            f"{name}: {stub.connections} connections, expected {min_connections}-{max_connections}"
+        )
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=200)
+    parser.add_argument("--attachment-kib", type=int, default=512)
+    parser.add_argument("--connections", type=int, default=3)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    recipients = [f"user{i}@example.com" for i in range(args.recipients)]
+    delay = args.handshake_ms / 1000
+    n, size = args.recipients, args.connections
+    # each pooled connection is recycled after MAX_MESSAGES
+    recycled = size + math.ceil(n / MAX_MESSAGES)
+    # drop well before a connection's share of the list, so drops happen at any size
+    drop_after = max(1, n // (4 * size))
+    per_connection = min(drop_after, MAX_MESSAGES)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp, "digest.pdf")
+        pdf.write_bytes(b"%PDF-1.4\n" + os.urandom(args.attachment_kib * 1024))
+        cases = [
+            ("per-message", {}, lambda stub: per_message(stub, recipients, pdf), (n, n)),
+            (f"pooled x{size}", {}, lambda stub: pooled(stub, recipients, pdf, size), (0, recycled)),
+            (
+                "pooled, drops",
+                {"drop_after": drop_after},
+                lambda stub: pooled(stub, recipients, pdf, size),
+                (math.ceil(n / per_connection), size + math.ceil(n / per_connection)),
+            ),
+        ]
+        problems: list[str] = []
+        print(f"{'mode':<16} {'sent':>5} {'wall s':>7} {'msg/s':>7} {'connections':>12}")
+        for name, stub_kwargs, run, (low, high) in cases:
+            with SMTPStub(handshake_delay=delay, **stub_kwargs) as stub:
+                start = time.perf_counter()
+                sent = run(stub)
+                wall = time.perf_counter() - start
+                print(f"{name:<16} {sent:5d} {wall:7.2f} {sent / wall:7.1f} {stub.connections:12d}")
+                problems += check(name, stub, recipients, high, low)
+    for problem in problems:
+        print(f"check failed: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+"""Compare streaming PDF generation with an eager, full-resolution build.
+
+Each (mode, size) case runs in a fresh interpreter so peak RSS is not
+polluted by earlier cases. The eager mode mirrors building the whole story
+list up front and embedding every article image at source resolution; its
+memory grows by roughly 10 MiB per article, so sizes above ``--eager-limit``
+run the streaming mode only.
+
+Usage::
+
+    python -m benchmarks.bench_pdf_report [--sizes 50 500 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+DISTINCT_IMAGES = 20
+IMAGE_SIZE = (1600, 1000)
+
+
+def make_images() -> list[bytes]:
+    """Return distinct, noisy full-size JPEGs like typical article thumbnails."""
+    from PIL import Image
+
+    images = []
+    for seed in range(DISTINCT_IMAGES):
+        noise = Image.effect_noise(IMAGE_SIZE, 40 + seed)
+        img = Image.merge("RGB", (noise, noise.rotate(90, expand=False), noise.transpose(0)))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=92)
+        images.append(buf.getvalue())
+    return images
+
+
+def make_items(count: int, images: list[bytes]):
+    from toolbox.pdf_report import ReportItem
+
+    for i in range(count):
+        yield ReportItem(
+            title=f"Article {i}: sample headline for benchmarking",
+            link=f"https://example.com/articles/{i}",
+            summary="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8,
+            source="example.com",
+            published="2026-01-01",
+            image=images[i % len(images)],
+        )
+
+
+def build_eager(path: str, count: int, images: list[bytes]) -> None:
+    """Baseline: materialise every flowable and embed images as-is."""
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer
+
+    from toolbox.pdf_report import StreamingReport
+
+    styles = StreamingReport(path, "bench", thumbnails=None).styles
+    story = [Paragraph("Benchmark digest", styles["title"])]
+    for item in list(make_items(count, images)):
+        story.append(Paragraph(item.title, styles["heading"]))
+        story.append(Paragraph(item.source, styles["meta"]))
+        story.append(Image(io.BytesIO(item.image), width=60 * mm, height=37.5 * mm))
+        story.append(Paragraph(item.summary, styles["body"]))
+        story.append(Spacer(1, 5 * mm))
+    SimpleDocTemplate(path).build(story)
+
+
+def build_streaming(path: str, count: int, images: list[bytes]) -> None:
+    from toolbox.pdf_report import build_report
+
+    build_report(path, "Benchmark digest", make_items(count, images))
+
+
+def run_case(mode: str, count: int) -> dict:
+    """Run one case in this process and return its measurements."""
+    images = make_images()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.pdf")
+        start = time.perf_counter()
+        (build_eager if mode == "eager" else build_streaming)(path, count, images)
+        wall = time.perf_counter() - start
+        size = os.path.getsize(path)
+    # ru_maxrss is KiB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"mode": mode, "articles": count, "wall_s": wall, "peak_rss_mib": rss, "pdf_kib": size / 1024}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--eager-limit", type=int, default=500)
+    parser.add_argument("--case", choices=["eager", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.sizes[0])))
+        return 0
+
+    with tempfile.TemporaryDirectory() as cache:
+        # a warm thumbnail cache is the steady state for scheduled runs
+        env = dict(os.environ, TOOLBOX_CACHE_DIR=cache)
+        print(f"{'mode':<10} {'articles':>8} {'wall s':>8} {'peak MiB':>9} {'PDF KiB':>9}")
+        for count in args.sizes:
+            for mode in ("eager", "streaming"):
+                if mode == "eager" and count > args.eager_limit:
+                    print(f"{mode:<10} {count:8d}  skipped (above --eager-limit)")
+                    continue
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pdf_report", "--case", mode, "--sizes", str(count)],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                    env=env,
+                ).stdout
+                r = json.loads(out)
+                print(f"{mode:<10} {count:8d} {r['wall_s']:8.2f} {r['peak_rss_mib']:9.1f} {r['pdf_kib']:9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
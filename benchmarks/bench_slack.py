@@ -0,0 +1,152 @@
+"""Deliver digests from several skills at once to a rate-limiting Slack stub.
+
+The naive mode posts one message per item, per skill in turn, sleeping on
+each ``429``; the batched mode uses :class:`toolbox.slack.SlackDispatcher`
+with all skills submitting concurrently. Two of the skills share a channel.
+Time is scaled down: the stub allows one message per ``--interval`` seconds
+per channel instead of Slack's one per second.
+
+The batched run is then checked: every item reaches its channel exactly
+once and in order, the PDF is uploaded once per channel, and a ``429`` is
+retried after ``Retry-After``. A failed check exits with status 1.
+
+Usage::
+
+    python -m benchmarks.bench_slack [--items 120] [--interval 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+from benchmarks.stubs import SlackStub
+from toolbox import slack
+
+SKILLS = {
+    "ai-news-summary": "C0AI",
+    "aws-blog-summary": "C0AWS",
+    "jp-it-news-summary": "C0AI",
+}
+
+ITEM_LINK = re.compile(r"<https://example\.com/([^/]+)/(\d+)\|")
+
+
+def digest(skill: str, count: int) -> list[list[dict]]:
+    return [
+        slack.item_blocks(
+            f"{skill} article {i}",
+            f"https://example.com/{skill}/{i}",
+            "Summary sentence for the benchmark digest. " * 6,
+            "example.com",
+        )
+        for i in range(count)
+    ]
+
+
+def run_naive(stub: SlackStub, count: int) -> None:
+    session = requests.Session()
+    for skill, channel in SKILLS.items():
+        for blocks in digest(skill, count):
+            while True:
+                resp = session.post(
+                    f"{stub.url}/api/chat.postMessage",
+                    json={"channel": channel, "blocks": blocks, "text": skill},
+                    headers={"Authorization": "Bearer xoxb-test"},
+                )
+                if resp.status_code != 429:
+                    break
+                time.sleep(float(resp.headers["Retry-After"]))
+
+
+def run_batched(stub: SlackStub, count: int, pdf: Path) -> None:
+    client = slack.SlackClient("xoxb-test", base_url=f"{stub.url}/api")
+    with slack.SlackDispatcher() as dispatcher:
+
+        def skill_run(skill: str, channel: str) -> None:
+            futures = dispatcher.post_digest(client, channel, skill, digest(skill, count))
+            client.upload_file(pdf, channel, title=f"{skill}.pdf")
+            for future in futures:
+                future.result()
+
+        threads = [threading.Thread(target=skill_run, args=item) for item in SKILLS.items()]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+
+def check_delivery(stub: SlackStub, count: int) -> list[str]:
+    """Problems with what the batched run delivered, if any."""
+    problems = []
+    received: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for message in stub.messages:
+        for block in message["blocks"]:
+            match = ITEM_LINK.search(block.get("text", {}).get("text", ""))
+            if match:
+                received[message["channel"], match[1]].append(int(match[2]))
+    for skill, channel in SKILLS.items():
+        if received[channel, skill] != list(range(count)):
+            problems.append(f"{skill}: items on {channel} not delivered exactly once, in order")
+    channels = len(set(SKILLS.values()))
+    if len(stub.uploads) != channels or len(stub.completed) != channels:
+        problems.append(f"PDF uploaded {len(stub.uploads)} times, expected once per channel ({channels})")
+    return problems
+
+
+def check_retry_after(interval: float) -> list[str]:
+    """Two back-to-back posts: the second must get a 429 and wait it out."""
+    with SlackStub(min_interval=interval, retry_after=interval) as stub:
+        client = slack.SlackClient("xoxb-test", base_url=f"{stub.url}/api")
+        start = time.perf_counter()
+        try:
+            for i in range(2):
+                client.post_message("C0RETRY", [], f"retry check {i}")
+        except (slack.SlackError, requests.RequestException) as exc:
+            return [f"posting through a 429 failed: {exc}"]
+        elapsed = time.perf_counter() - start
+    if stub.rate_limited != 1 or [m["text"] for m in stub.messages] != ["retry check 0", "retry check 1"]:
+        return [f"429 not retried once: {stub.rate_limited} rejected, {len(stub.messages)} delivered"]
+    if elapsed < interval:
+        return [f"retried after {elapsed:.2f}s, before Retry-After ({interval:.2f}s)"]
+    return []
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=120, help="items per skill")
+    parser.add_argument("--interval", type=float, default=0.2, help="stub seconds per message per channel")
+    args = parser.parse_args(argv)
+
+    slack.CHANNEL_RATE = 1 / args.interval
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp, "digest.pdf")
+        pdf.write_bytes(b"%PDF-1.4\n" + b"0" * 200_000)
+        print(f"{'mode':<8} {'wall s':>7} {'messages':>9} {'429s':>5} {'uploads':>8}")
+        for mode in ("naive", "batched"):
+            with SlackStub(min_interval=args.interval, retry_after=args.interval) as stub:
+                start = time.perf_counter()
+                if mode == "naive":
+                    run_naive(stub, args.items)
+                else:
+                    run_batched(stub, args.items, pdf)
+                wall = time.perf_counter() - start
+                print(f"{mode:<8} {wall:7.2f} {len(stub.messages):9d} {stub.rate_limited:5d} {len(stub.uploads):8d}")
+                if mode == "batched":
+                    problems = check_delivery(stub, args.items)
+    problems += check_retry_after(args.interval)
+    for problem in problems:
+        print(f"check failed: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+"""Replay full skill runs against local fixtures and stubs and profile them.
+
+Every round runs :class:`toolbox.pipeline.Pipeline` for all skills with
+cold caches. Feeds and article pages come from :class:`ReplayStub`, the
+digest goes to the Slack stub, the PDF to the Drive stub, and each report is
+then e-mailed to ``--recipients`` addresses through the SMTP stub (the
+``email`` stage). Timings are collected with :mod:`toolbox.profiling`, so
+the table shows calls, p50/p95 latency and items/s per stage and skill, next
+to the finer hooks (``feed.parse``, ``extract.parse``, ``pdf.thumbnail``,
+``slack.request``, ``smtp.send`` ...).
+
+Each round then runs again on the same cache directory, as the next
+scheduled run would. That warm pass is timed separately (its own table): the
+feeds must come back as ``304`` cache hits and dedup must leave no articles,
+so nothing is extracted or delivered twice; otherwise the suite exits 1.
+
+Import and start-up cost is measured in fresh interpreters: the import time
+of each toolbox module and the first ``default_user_agent()`` call, which
+initialises fake-useragent.
+
+Usage::
+
+    python -m benchmarks.run_suite [--rounds 5] [--latency 0.02]
+    python -m benchmarks.run_suite --json suite.json --cprofile --tracemalloc
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Mapping
+
+from benchmarks.stubs import DriveStub, ReplayStub, SlackStub, SMTPStub
+from toolbox import profiling, slack
+from toolbox.gdrive import DriveUploader, TokenCache
+from toolbox.mailer import SMTPPool, send_bulk
+from toolbox.pipeline import SKILLS, Pipeline, SkillRun
+
+FEEDS = {
+    "ai-news-summary": ["ai_blog.xml"],
+    "aws-blog-summary": ["aws_blog.xml"],
+    "jp-it-news-summary": ["itmedia_news.xml"],
+}
+
+STARTUP_MODULES = (
+    "toolbox.feeds",
+    "toolbox.extract",
+    "toolbox.pdf_report",
+    "toolbox.slack",
+    "toolbox.gdrive",
+    "toolbox.mailer",
+    "toolbox.pipeline",
+)
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+imported = time.perf_counter()
+from toolbox.session import default_user_agent
+ua_start = time.perf_counter()
+default_user_agent()
+print(json.dumps({"import_s": imported - start, "user_agent_s": time.perf_counter() - ua_start}))
+"""
+
+
+def measure_startup(repeats: int) -> dict[str, Any]:
+    """Time imports and fake-useragent initialisation in fresh interpreters."""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("TOOLBOX_PROFILE")}
+    root = Path(__file__).resolve().parent.parent
+    imports: dict[str, dict[str, float]] = {}
+    user_agent: list[float] = []
+    for module in STARTUP_MODULES:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT, module],
+                cwd=root,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            process = time.perf_counter() - start
+            result = json.loads(out.stdout)
+            samples.append(result["import_s"])
+            user_agent.append(result["user_agent_s"])
+            imports.setdefault(module, {})["process_s"] = process
+        imports[module].update(
+            p50_s=profiling.percentile(samples, 50), p95_s=profiling.percentile(samples, 95)
+        )
+    return {
+        "imports": imports,
+        "user_agent": {
+            "p50_s": profiling.percentile(user_agent, 50),
+            "p95_s": profiling.percentile(user_agent, 95),
+        },
+    }
+
+
+class ReplayPipeline(Pipeline):
+    """A pipeline whose Slack and Drive clients talk to the stubs."""
+
+    def __init__(self, slack_stub: SlackStub, drive: DriveUploader, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.slack_url = f"{slack_stub.url}/api"
+        self.drive = drive
+
+    def _slack_client(self, settings: Mapping[str, Any]) -> slack.SlackClient:
+        return slack.SlackClient(settings["slack_bot_token"], session=self.session, base_url=self.slack_url)
+
+    def _drive_uploader(self, settings: Mapping[str, Any]) -> DriveUploader:
+        return self.drive
+
+
+def write_settings(tmp: Path, replay: ReplayStub, drive: DriveStub) -> Path:
+    secret = tmp / "client_secret.json"
+    secret.write_text(
+        json.dumps({"installed": {"client_id": "id", "client_secret": "s", "token_uri": f"{drive.url}/token"}})
+    )
+    skills = {
+        name: {
+            "feeds": replay.feed_urls(*FEEDS[name]),
+            "slack_bot_token": "xoxb-bench",
+            "slack_channel_id": f"C0{i}",
+            "gdrive_folder_id": "folder-bench",
+        }
+        for i, name in enumerate(SKILLS)
+    }
+    path = tmp / "settings.json"
+    path.write_text(json.dumps({"common": {"gdrive_client_secret": str(secret)}, "skills": skills}))
+    return path
+
+
+def email_reports(runs: list[SkillRun], smtp: SMTPStub, recipients: int) -> None:
+    addresses = [f"reader{i}@example.com" for i in range(recipients)]
+    with SMTPPool("127.0.0.1", smtp.port, "bench", "secret", starttls=False) as pool:
+        for run in runs:
+            if run.report is None:
+                continue
+            with profiling.timed("email", run.spec.name, items=recipients):
+                send_bulk(pool, "bench@example.com", addresses, run.spec.title, "", [run.report])
+
+
+def warm_problems(pipeline: Pipeline, runs: list[SkillRun], replay: ReplayStub, revalidated: int) -> list[str]:
+    """What a run on an already-warm cache did that it should not have."""
+    feeds = sum(len(run.spec.feeds) for run in runs)
+    problems = []
+    if pipeline.fetcher.cache.stats.hits != feeds or revalidated != feeds:
+        problems.append(
+            f"warm pass: {pipeline.fetcher.cache.stats.hits} cache hits and {revalidated} 304s for {feeds} feeds"
+        )
+    for run in runs:
+        if run.error:
+            problems.append(f"warm pass: {run.spec.name}: {run.error}")
+        elif run.timings["dedup"].items:
+            problems.append(f"warm pass: {run.spec.name}: dedup kept {run.timings['dedup'].items} articles")
+    return problems
+
+
+def format_stages(rows: list[dict[str, Any]]) -> str:
+    lines = [f"{'stage':<18} {'skill':<20} {'calls':>6} {'items':>6} {'p50 ms':>8} {'p95 ms':>8} {'items/s':>9}"]
+    for r in rows:
+        lines.append(
+            f"{r['name']:<18} {r['skill'] or '-':<20} {r['calls']:6d} {r['items']:6d} "
+            f"{r['p50_s'] * 1000:8.1f} {r['p95_s'] * 1000:8.1f} {r['items_per_s']:9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="replay stub seconds per request")
+    parser.add_argument("--recipients", type=int, default=10, help="e-mail recipients per report")
+    parser.add_argument("--startup-repeats", type=int, default=3, help="0 skips the start-up measurements")
+    parser.add_argument("--json", type=Path, help="write the machine-readable report here")
+    parser.add_argument("--cprofile", action="store_true")
+    parser.add_argument("--tracemalloc", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    # the Slack stub does not rate limit here; keep the client from doing so either
+    slack.CHANNEL_RATE = 1000.0
+    profiler = profiling.Profiler(args.json, cprofile=args.cprofile, tracemalloc=args.tracemalloc)
+    warm = profiling.Profiler()
+    previous = profiling.install(profiler)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir, ReplayStub(args.latency) as replay, SlackStub(
+            min_interval=0
+        ) as slack_stub, DriveStub() as drive_stub, SMTPStub() as smtp:
+            tmp = Path(tmpdir)
+            os.environ["TOOLBOX_SETTINGS"] = str(write_settings(tmp, replay, drive_stub))
+            (tmp / "token.json").write_text(json.dumps({"refresh_token": "1//refresh"}))
+            for i in range(args.rounds):
+                os.environ["TOOLBOX_CACHE_DIR"] = str(tmp / f"cache-{i}")
+                Path(os.environ["TOOLBOX_CACHE_DIR"]).mkdir()
+                drive = DriveUploader(
+                    TokenCache(tmp / "client_secret.json", tmp / "token.json"),
+                    api_url=f"{drive_stub.url}/drive/v3",
+                    upload_url=f"{drive_stub.url}/upload/drive/v3",
+                )
+                with ReplayPipeline(
+                    slack_stub, drive, output_dir=tmp / f"reports-{i}", max_age_hours=float("inf")
+                ) as pipeline:
+                    with profiling.timed("run") as sample:
+                        runs = pipeline.run(list(SKILLS))
+                        sample.items = sum(len(run.articles) for run in runs)
+                email_reports(runs, smtp, args.recipients)
+                failed = [run for run in runs if run.error]
+                if failed:
+                    print("; ".join(f"{run.spec.name}: {run.error}" for run in failed), file=sys.stderr)
+                    return 1
+
+                profiling.install(warm)
+                revalidated = replay.not_modified
+                with ReplayPipeline(
+                    slack_stub, drive, output_dir=tmp / f"reports-{i}", max_age_hours=float("inf")
+                ) as pipeline:
+                    with profiling.timed("run") as sample:
+                        runs = pipeline.run(list(SKILLS))
+                        sample.items = sum(len(run.articles) for run in runs)
+                    problems = warm_problems(pipeline, runs, replay, replay.not_modified - revalidated)
+                profiling.install(profiler)
+                for problem in problems:
+                    print(f"check failed: {problem}", file=sys.stderr)
+                if problems:
+                    return 1
+            profiler.extra["deliveries"] = {
+                "slack_messages": len(slack_stub.messages),
+                "slack_uploads": len(slack_stub.uploads),
+                "drive_files": len(drive_stub.files),
+                "emails": len(smtp.messages),
+            }
+    finally:
+        profiling.install(previous)
+
+    if args.startup_repeats:
+        profiler.extra["startup"] = measure_startup(args.startup_repeats)
+    profiler.extra["warm"] = {"stages": warm.stages()}
+    report = profiler.report()
+    print(format_stages(report["stages"]))
+    print("\nwarm cache, same feeds again:")
+    print(format_stages(report["warm"]["stages"]))
+    print(f"\npeak RSS {report['memory']['max_rss_bytes'] / 2**20:.0f} MiB", end="")
+    if args.tracemalloc:
+        print(f", traced peak {report['memory']['tracemalloc']['peak_bytes'] / 2**20:.0f} MiB", end="")
+    print()
+    if args.startup_repeats:
+        print(f"\n{'module':<20} {'import p50 ms':>14} {'process ms':>11}")
+        for module, t in report["startup"]["imports"].items():
+            print(f"{module:<20} {t['p50_s'] * 1000:14.1f} {t['process_s'] * 1000:11.1f}")
+        print(f"{'fake-useragent init':<20} {report['startup']['user_agent']['p50_s'] * 1000:14.1f}")
+    if args.json:
+        profiler.write()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,412 @@
+"""Local stand-ins for the external services the skills talk to.
+
+Each stub is a threaded HTTP server on ``127.0.0.1`` with an ephemeral port,
+used as a context manager::
+
+    with SlackStub(min_interval=0.2) as slack:
+        client = SlackClient("xoxb-test", base_url=slack.url + "/api")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import re
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address) -> None:
+        # partial readers (toolbox.extract) hang up mid-response on purpose
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Base class: subclasses implement ``handle(handler, method, path, body)``."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                stub.handle(self, method, self.path, body)
+
+            def do_GET(self) -> None:
+                self._dispatch("GET")
+
+            def do_POST(self) -> None:
+                self._dispatch("POST")
+
+            def do_PUT(self) -> None:
+                self._dispatch("PUT")
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def reply(handler, status: int, body: bytes | dict = b"", headers: dict | None = None) -> None:
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        handler.send_response(status)
+        for key, value in (headers or {}).items():
+            handler.send_header(key, str(value))
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler, method: str, path: str, body: bytes) -> None:
+        raise NotImplementedError
+
+
+class ReplayStub(StubServer):
+    """Serves the recorded feeds and article pages under ``fixtures/``.
+
+    Absolute URLs in the fixtures are rewritten from ``https://host/path`` to
+    ``{url}/host/path``, so feed links and ``og:image`` URLs resolve here.
+    Feeds are at ``/feeds/<name>.xml`` and carry an ``ETag``; a matching
+    ``If-None-Match`` gets ``304`` (counted in ``not_modified``). Any other
+    path returns the article fixture recorded for its host, or a generated
+    JPEG for image paths. ``latency`` is slept before every response.
+    """
+
+    ARTICLES = {"aws.amazon.com": "aws_blog.html", "www.itmedia.co.jp": "itmedia_news.html"}
+    IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__()
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        absolute = re.compile(rb"https?://")
+        prefix = self.url.encode() + b"/"
+        self.feeds = {p.name: absolute.sub(prefix, p.read_bytes()) for p in (FIXTURES / "feeds").glob("*.xml")}
+        self.pages = {p.name: absolute.sub(prefix, p.read_bytes()) for p in (FIXTURES / "html").glob("*.html")}
+        self.image = self._make_image()
+
+    @staticmethod
+    def _make_image() -> bytes:
+        from PIL import Image
+
+        # a hero-sized photo stand-in that the thumbnail cache has to shrink
+        gradient = Image.linear_gradient("L").resize((1600, 1000))
+        img = Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), gradient))
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=90)
+        return out.getvalue()
+
+    def feed_urls(self, *names: str) -> list[str]:
+        return [f"{self.url}/feeds/{name}" for name in names or sorted(self.feeds)]
+
+    def handle(self, handler, method: str, path: str, body: bytes) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+        route = urlsplit(path).path
+        if route.startswith("/feeds/"):
+            feed = self.feeds.get(route.rsplit("/", 1)[1])
+            if feed is None:
+                self.reply(handler, 404, b"")
+                return
+            etag = f'"{hashlib.md5(feed).hexdigest()}"'
+            if handler.headers.get("If-None-Match") == etag:
+                with self.lock:
+                    self.not_modified += 1
+                self.reply(handler, 304, b"", {"ETag": etag})
+            else:
+                headers = {"Content-Type": "application/rss+xml; charset=utf-8", "ETag": etag}
+                self.reply(handler, 200, feed, headers)
+        elif route.lower().endswith(self.IMAGE_SUFFIXES):
+            self.reply(handler, 200, self.image, {"Content-Type": "image/jpeg"})
+        else:
+            host = route.lstrip("/").split("/", 1)[0]
+            page = self.pages[self.ARTICLES.get(host, "generic_article.html")]
+            self.reply(handler, 200, page, {"Content-Type": "text/html; charset=utf-8"})
+
+
+class SlackStub(StubServer):
+    """Slack Web API and webhook stub that rate limits each channel.
+
+    A message arriving less than ``min_interval`` seconds after the previous
+    accepted one for the same channel gets ``429`` with ``Retry-After``.
+    """
+
+    def __init__(self, min_interval: float = 1.0, retry_after: float = 1.0) -> None:
+        super().__init__()
+        self.min_interval = min_interval
+        self.retry_after = retry_after
+        self.messages: list[dict] = []
+        self.uploads: dict[str, int] = {}
+        self.completed: list[dict] = []
+        self.rate_limited = 0
+        self._last: dict[str, float] = {}
+
+    def _throttle(self, handler, key: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            if now - self._last.get(key, float("-inf")) < self.min_interval:
+                self.rate_limited += 1
+                limited = True
+            else:
+                self._last[key] = now
+                limited = False
+        if limited:
+            # real Slack sends whole seconds; fractions keep benchmarks short
+            self.reply(handler, 429, {"ok": False, "error": "ratelimited"}, {"Retry-After": self.retry_after})
+        return limited
+
+    def handle(self, handler, method: str, path: str, body: bytes) -> None:
+        route = urlsplit(path).path
+        if route == "/api/chat.postMessage":
+            payload = json.loads(body)
+            if not self._throttle(handler, payload["channel"]):
+                with self.lock:
+                    self.messages.append(payload)
+                self.reply(handler, 200, {"ok": True, "ts": f"{time.time():.6f}"})
+        elif route == "/webhook":
+            if not self._throttle(handler, "webhook"):
+                with self.lock:
+                    self.messages.append(json.loads(body))
+                self.reply(handler, 200, b"ok")
+        elif route == "/api/files.getUploadURLExternal":
+            file_id = f"F{uuid.uuid4().hex[:10].upper()}"
+            self.reply(handler, 200, {"ok": True, "file_id": file_id, "upload_url": f"{self.url}/upload/{file_id}"})
+        elif route.startswith("/upload/"):
+            with self.lock:
+                self.uploads[route.rsplit("/", 1)[1]] = len(body)
+            self.reply(handler, 200, b"OK - %d" % len(body))
+        elif route == "/api/files.completeUploadExternal":
+            params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+            with self.lock:
+                self.completed.append(params)
+            self.reply(handler, 200, {"ok": True, "files": json.loads(params["files"])})
+        else:
+            self.reply(handler, 404, {"ok": False, "error": "unknown_method"})
+
+
+class DriveStub(StubServer):
+    """Google OAuth token endpoint and Drive v3 list/resumable-upload stub.
+
+    ``latency`` is added to every request and ``bandwidth`` (bytes/s) limits
+    each chunk, to make parallel uploads measurable. Every ``fail_every``-th
+    chunk keeps only its first half and answers ``503``; every
+    ``fail_status_every``-th status query (an empty ``PUT``) answers ``503``.
+    """
+
+    def __init__(
+        self, latency: float = 0.0, bandwidth: float = 0.0, fail_every: int = 0, fail_status_every: int = 0
+    ) -> None:
+        super().__init__()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.fail_every = fail_every
+        self.fail_status_every = fail_status_every
+        self.files: dict[str, dict] = {}
+        self.sessions: dict[str, dict] = {}
+        self.token_requests = 0
+        self.chunks = 0
+        self.status_queries = 0
+        self.bytes_received = 0
+
+    def handle(self, handler, method: str, path: str, body: bytes) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(path)
+        if parts.path == "/token":
+            with self.lock:
+                self.token_requests += 1
+            self.reply(handler, 200, {"access_token": f"ya29.test-{self.token_requests}", "expires_in": 3600})
+            return
+        if not handler.headers.get("Authorization", "").startswith("Bearer ya29."):
+            self.reply(handler, 401, {"error": {"code": 401}})
+            return
+        if parts.path == "/drive/v3/files" and method == "GET":
+            query = parse_qs(parts.query)["q"][0]
+            folder = query.split("'")[1]
+            with self.lock:
+                files = [
+                    {"id": f["id"], "md5Checksum": f["md5Checksum"]}
+                    for f in self.files.values()
+                    if folder in f["parents"]
+                ]
+            self.reply(handler, 200, {"files": files})
+        elif parts.path == "/upload/drive/v3/files" and method == "POST":
+            meta = json.loads(body)
+            sid = uuid.uuid4().hex
+            with self.lock:
+                self.sessions[sid] = {
+                    "meta": meta,
+                    "size": int(handler.headers["X-Upload-Content-Length"]),
+                    "data": bytearray(),
+                }
+            self.reply(handler, 200, {}, {"Location": f"{self.url}/upload/session/{sid}"})
+        elif parts.path.startswith("/upload/session/") and method == "PUT":
+            self._put(handler, parts.path.rsplit("/", 1)[1], body)
+        else:
+            self.reply(handler, 404, {"error": {"code": 404}})
+
+    def _put(self, handler, sid: str, body: bytes) -> None:
+        session = self.sessions.get(sid)
+        if session is None:
+            self.reply(handler, 404, {"error": {"code": 404}})
+            return
+        data = session["data"]
+        content_range = handler.headers["Content-Range"].split(" ", 1)[1]
+        if body:
+            start = int(content_range.split("-", 1)[0])
+            if self.bandwidth:
+                time.sleep(len(body) / self.bandwidth)
+            with self.lock:
+                self.chunks += 1
+                self.bytes_received += len(body)
+                failing = self.fail_every and self.chunks % self.fail_every == 0
+            if start == len(data):
+                data += body[: len(body) // 2] if failing else body
+            if failing:
+                self.reply(handler, 503, {"error": {"code": 503}})
+                return
+        else:
+            with self.lock:
+                self.status_queries += 1
+                failing = self.fail_status_every and self.status_queries % self.fail_status_every == 0
+            if failing:
+                self.reply(handler, 503, {"error": {"code": 503}})
+                return
+        if len(data) == session["size"]:
+            with self.lock:
+                file_id = f"file-{len(self.files) + 1}"
+                self.files[file_id] = {
+                    "id": file_id,
+                    "name": session["meta"]["name"],
+                    "parents": session["meta"]["parents"],
+                    "md5Checksum": hashlib.md5(data).hexdigest(),
+                }
+            self.reply(handler, 200, {"id": file_id})
+        else:
+            headers = {"Range": f"bytes=0-{len(data) - 1}"} if data else {}
+            self.reply(handler, 308, b"", headers)
+
+
+class SMTPStub:
+    """Minimal SMTP server in the spirit of ``aiosmtpd``'s debugging server.
+
+    Accepts ``AUTH PLAIN`` with any credentials and offers no TLS.
+    ``handshake_delay`` is slept on connect and on ``AUTH`` to stand in for
+    the TLS handshake and login round trips of a real server. With
+    ``drop_after`` a connection that already carried that many messages is
+    closed abruptly at the next ``MAIL``, like a server timing out a session.
+    """
+
+    def __init__(self, handshake_delay: float = 0.0, drop_after: int = 0) -> None:
+        self.handshake_delay = handshake_delay
+        self.drop_after = drop_after
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages: list[tuple[str, list[str], int]] = []
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                stub._session(self.rfile, self.wfile)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _session(self, rfile, wfile) -> None:
+        def say(line: str) -> None:
+            wfile.write(line.encode() + b"\r\n")
+            wfile.flush()
+
+        with self.lock:
+            self.connections += 1
+        time.sleep(self.handshake_delay)
+        say("220 stub ESMTP")
+        sender, recipients, sent = "", [], 0
+        while True:
+            line = rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                say("250-stub\r\n250-AUTH PLAIN\r\n250 8BITMIME")
+            elif verb == "AUTH":
+                time.sleep(self.handshake_delay)
+                say("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                if self.drop_after and sent >= self.drop_after:
+                    return
+                sender, recipients = command.split(":", 1)[1].strip(), []
+                say("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip())
+                say("250 OK")
+            elif verb == "DATA":
+                say("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data in iter(rfile.readline, b""):
+                    if data == b".\r\n":
+                        break
+                    size += len(data)
+                with self.lock:
+                    self.messages.append((sender, recipients, size))
+                sent += 1
+                say("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                say("250 OK")
+            elif verb == "QUIT":
+                say("221 Bye")
+                return
+            else:
+                say("502 Command not implemented")
@@ -0,0 +1,11 @@
+"""Shared runtime for the Claude Toolbox skills.
+
+Modules are imported individually (``from toolbox import feeds``) so a skill
+only pays for the dependencies it actually uses.
+
+Setting ``TOOLBOX_PROFILE`` turns on :mod:`toolbox.profiling` for the run.
+"""
+
+from toolbox import profiling
+
+profiling.enable_from_env()
@@ -0,0 +1,221 @@
+"""Local index of articles each skill has already processed.
+
+Entries are keyed per skill by their normalised link (or GUID) together with
+a hash of their title and summary. A skill asks :meth:`ArticleIndex.new_entries`
+which feed entries still need work, and skips the HTML fetch, extraction and
+summary for everything else, so an hourly run only handles what is new.
+
+The retention passed to ``compact`` must exceed the longest time window a
+skill collects, otherwise pruned articles come back as new.
+
+Usage::
+
+    python -m toolbox.article_index stats
+    python -m toolbox.article_index compact --days 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from toolbox.config import cache_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    skill TEXT NOT NULL,
+    key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    title TEXT,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    summarized_at REAL,
+    posted_at REAL,
+    PRIMARY KEY (skill, key)
+);
+CREATE INDEX IF NOT EXISTS articles_updated_at ON articles (updated_at);
+"""
+
+STAGES = ("seen", "summarized", "posted")
+
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "ref", "ref_src", "cmpid", "source"})
+
+# SQLite's default limit on host parameters is 999 on older builds.
+QUERY_CHUNK = 500
+
+
+def normalize_link(url: str) -> str:
+    """Canonicalise an article URL so trivially different links compare equal.
+
+    Lowercases scheme and host, drops ``www.``, default ports, fragments and
+    tracking parameters, sorts the query and strips a trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").removeprefix("www.")
+    if parts.port and (scheme, parts.port) not in {("http", 80), ("https", 443)}:
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def entry_key(entry: Mapping[str, Any]) -> str | None:
+    """Return the index key of a feed entry: its normalised link, else its GUID."""
+    link = entry.get("link")
+    if link:
+        return normalize_link(link)
+    return entry.get("id") or None
+
+
+def content_hash(entry: Mapping[str, Any]) -> str:
+    """Hash the parts of an entry whose change warrants a new summary."""
+    text = "\x1f".join(" ".join((entry.get(f) or "").split()) for f in ("title", "summary"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ArticleIndex:
+    """SQLite-backed record of entries seen, summarised and posted per skill."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else cache_dir() / "articles.sqlite3"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> ArticleIndex:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _known(self, skill: str, keys: list[str]) -> dict[str, tuple[str, float | None]]:
+        known = {}
+        with self._lock:
+            for i in range(0, len(keys), QUERY_CHUNK):
+                chunk = keys[i : i + QUERY_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, content_hash, summarized_at FROM articles "
+                    f"WHERE skill = ? AND key IN ({marks})",
+                    (skill, *chunk),
+                )
+                known.update((key, (digest, summarized)) for key, digest, summarized in rows)
+        return known
+
+    def new_entries(self, skill: str, entries: Iterable[Mapping[str, Any]]) -> list:
+        """Return entries that are unknown, changed, or not yet summarised.
+
+        Duplicates within ``entries`` are dropped, keeping the first. Entries
+        with neither link nor GUID are always returned.
+        """
+        keyed: dict[str, Mapping[str, Any]] = {}
+        unkeyed = []
+        for entry in entries:
+            key = entry_key(entry)
+            if key is None:
+                unkeyed.append(entry)
+            else:
+                keyed.setdefault(key, entry)
+        known = self._known(skill, list(keyed))
+        fresh = []
+        for key, entry in keyed.items():
+            digest, summarized = known.get(key, (None, None))
+            if digest != content_hash(entry) or summarized is None:
+                fresh.append(entry)
+        return fresh + unkeyed
+
+    def mark(self, skill: str, entries: Iterable[Mapping[str, Any]], stage: str = "seen") -> int:
+        """Record that ``entries`` reached ``stage``; returns the number recorded."""
+        if stage not in STAGES:
+            raise ValueError(f"unknown stage {stage!r}, expected one of {STAGES}")
+        now = time.time()
+        stamp = {"summarized": "summarized_at", "posted": "posted_at"}.get(stage)
+        rows = []
+        for entry in entries:
+            key = entry_key(entry)
+            if key is not None:
+                rows.append((skill, key, content_hash(entry), entry.get("title"), now))
+        # A changed hash invalidates the later stages recorded for the old content.
+        update = ["content_hash = excluded.content_hash", "title = excluded.title", "updated_at = ?5"]
+        for col in ("summarized_at", "posted_at"):
+            if col == stamp:
+                update.append(f"{col} = ?5")
+            else:
+                update.append(
+                    f"{col} = CASE WHEN articles.content_hash = excluded.content_hash "
+                    f"THEN articles.{col} END"
+                )
+        insert_cols, insert_vals = (f", {stamp}", ", ?5") if stamp else ("", "")
+        sql = (
+            f"INSERT INTO articles (skill, key, content_hash, title, first_seen, updated_at{insert_cols}) "
+            f"VALUES (?1, ?2, ?3, ?4, ?5, ?5{insert_vals}) "
+            f"ON CONFLICT (skill, key) DO UPDATE SET {', '.join(update)}"
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    def compact(self, retention_days: float) -> int:
+        """Delete articles not touched for ``retention_days`` and vacuum."""
+        cutoff = time.time() - retention_days * 86400
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM articles WHERE updated_at < ?", (cutoff,)
+            ).rowcount
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> list[tuple[str, int, int, int]]:
+        """Return ``(skill, seen, summarized, posted)`` counts per skill."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT skill, COUNT(*), COUNT(summarized_at), COUNT(posted_at) "
+                "FROM articles GROUP BY skill ORDER BY skill"
+            ).fetchall()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", help="index database (default: articles.sqlite3 in the cache dir)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats")
+    compact = sub.add_parser("compact")
+    compact.add_argument("--days", type=float, default=30.0, help="retention (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with ArticleIndex(args.path) as index:
+        if args.command == "compact":
+            print(f"removed {index.compact(args.days)} articles")
+        print(f"{'skill':<24} {'seen':>7} {'summarized':>10} {'posted':>7}")
+        for skill, seen, summarized, posted in index.stats():
+            print(f"{skill:<24} {seen:7d} {summarized:10d} {posted:7d}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+"""Paths and settings shared by the skills."""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cache_dir() -> Path:
+    """Return the on-disk cache directory, creating it if needed.
+
+    Defaults to ``$XDG_CACHE_HOME/claude-toolbox``; ``TOOLBOX_CACHE_DIR``
+    overrides it.
+    """
+    override = os.environ.get("TOOLBOX_CACHE_DIR")
+    if override:
+        path = Path(override)
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        path = Path(base) / "claude-toolbox"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def settings_path() -> Path:
+    """Return the settings file; ``TOOLBOX_SETTINGS`` overrides the default."""
+    return Path(os.environ.get("TOOLBOX_SETTINGS") or ROOT / "secrets" / "settings.json")
+
+
+@functools.lru_cache(maxsize=None)
+def load_settings(path: Path | None = None) -> dict[str, Any]:
+    """Load the settings file once per process."""
+    path = path or settings_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"{path} not found; copy secrets/settings.example.json and fill it in"
+        ) from None
+
+
+def skill_settings(skill: str, settings: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Return the ``common`` settings overlaid with those of ``skill``."""
+    settings = settings if settings is not None else load_settings()
+    return {**settings.get("common", {}), **settings.get("skills", {}).get(skill, {})}
@@ -0,0 +1,234 @@
+"""Concurrent RSS/Atom fetching for the news-summary skills.
+
+All feeds of a run are fetched on a bounded thread pool over one pooled
+``requests.Session``. Each host gets a small number of concurrent slots and
+each source a hard deadline, so a run takes roughly as long as its slowest
+feed rather than the sum of all of them.
+
+With a :class:`~toolbox.http_cache.FeedCache` attached, requests are
+conditional and unchanged feeds are served from disk without re-parsing.
+
+Usage::
+
+    python -m toolbox.feeds https://aws.amazon.com/blogs/aws/feed/ ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+from urllib.parse import urlsplit
+
+import feedparser
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+from toolbox import profiling
+from toolbox.http_cache import FeedCache
+from toolbox.session import build_session
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class FeedResult:
+    """Outcome of fetching a single feed."""
+
+    url: str
+    feed: feedparser.FeedParserDict | None = None
+    status: int | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+    size: int = 0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.feed is not None
+
+    @property
+    def entries(self) -> list:
+        return self.feed.entries if self.feed is not None else []
+
+
+class FeedFetcher:
+    """Fetch and parse many feeds concurrently.
+
+    ``timeout`` is the wall-clock budget for one source once its host slot
+    is acquired; ``per_host`` caps simultaneous connections to one host.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        *,
+        max_workers: int = 16,
+        per_host: int = 2,
+        timeout: float = 15.0,
+        connect_timeout: float = 5.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        cache: FeedCache | None = None,
+    ) -> None:
+        self.session = session or build_session(pool_maxsize=per_host)
+        self.cache = cache
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_bytes = max_bytes
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _download(
+        self, url: str, headers: dict[str, str], deadline: float
+    ) -> tuple[requests.Response, bytes]:
+        """GET ``url`` and read the body, giving up at ``deadline`` (monotonic)."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"read exceeded {self.timeout:.1f}s")
+        resp = self.session.get(
+            url,
+            headers=headers,
+            timeout=(self.connect_timeout, remaining),
+            stream=True,
+        )
+        with resp:
+            resp.raise_for_status()
+            chunks: list[bytes] = []
+            size = 0
+            # read1 returns after one socket read, so a host trickling a
+            # byte at a time cannot hold us past the deadline
+            try:
+                while chunk := resp.raw.read1(CHUNK_SIZE, decode_content=True):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise requests.exceptions.ContentDecodingError(
+                            f"feed larger than {self.max_bytes} bytes"
+                        )
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout(f"read exceeded {self.timeout:.1f}s")
+            # the translation iter_content would have done
+            except ReadTimeoutError as exc:
+                raise requests.exceptions.ConnectionError(exc) from exc
+            except ProtocolError as exc:
+                raise requests.exceptions.ChunkedEncodingError(exc) from exc
+            except DecodeError as exc:
+                raise requests.exceptions.ContentDecodingError(exc) from exc
+        return resp, b"".join(chunks)
+
+    def fetch(self, url: str) -> FeedResult:
+        """Fetch and parse one feed. Errors are recorded, never raised."""
+        result = FeedResult(url)
+        with self._host_slot(url):
+            start = time.monotonic()
+            deadline = start + self.timeout
+            try:
+                headers = self.cache.validators(url) if self.cache else {}
+                resp, body = self._download(url, headers, deadline)
+                if resp.status_code == 304 and self.cache:
+                    result.feed = self.cache.load(url)
+                    result.cached = result.feed is not None
+                    if not result.cached:
+                        # evicted by another process since validators() was read
+                        resp, body = self._download(url, {}, deadline)
+                if resp.status_code == 304 and not result.cached:
+                    # no cache, or a 304 even to the unconditional retry: nothing to reuse
+                    raise requests.HTTPError("304 Not Modified without a cached copy", response=resp)
+                result.status = resp.status_code
+                result.size = len(body)
+                if not result.cached:
+                    with profiling.timed("feed.parse"):
+                        result.feed = feedparser.parse(body, response_headers=dict(resp.headers))
+                    if self.cache:
+                        self.cache.store(url, resp.headers, result.feed)
+            except requests.RequestException as exc:
+                result.error = f"{type(exc).__name__}: {exc}"
+            except Exception as exc:
+                # a bug or a parser surprise must not take fetch_all's whole batch down
+                logger.exception("unexpected error fetching %s", url)
+                result.error = f"{type(exc).__name__}: {exc}"
+            result.elapsed = time.monotonic() - start
+        profiling.record("feed.fetch", result.elapsed)
+        if result.error:
+            logger.warning("feed %s failed after %.2fs: %s", url, result.elapsed, result.error)
+        return result
+
+    def fetch_all(self, urls: Iterable[str]) -> list[FeedResult]:
+        """Fetch ``urls`` concurrently; results keep the input order."""
+        urls = list(urls)
+        if not urls:
+            return []
+        start = time.monotonic()
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed") as pool:
+            results = list(pool.map(self.fetch, urls))
+        wall = time.monotonic() - start
+        slowest = max(results, key=lambda r: r.elapsed)
+        logger.info(
+            "fetched %d feeds in %.2fs (%d failed, slowest %.2fs %s, serial sum %.2fs)",
+            len(results),
+            wall,
+            sum(not r.ok for r in results),
+            slowest.elapsed,
+            slowest.url,
+            sum(r.elapsed for r in results),
+        )
+        if self.cache:
+            logger.info("feed cache: %s", self.cache.stats)
+        for r in results:
+            logger.debug("%7.2fs %s %s", r.elapsed, r.status or "-", r.url)
+        return results
+
+
+def format_timings(results: list[FeedResult]) -> str:
+    """Render per-feed timings, slowest first."""
+    lines = [f"{'time':>7}  {'status':>6}  {'KiB':>7}  {'entries':>7}  url"]
+    for r in sorted(results, key=lambda r: r.elapsed, reverse=True):
+        status = str(r.status) if r.status is not None else "ERR"
+        lines.append(
+            f"{r.elapsed:6.2f}s  {status:>6}  {r.size / 1024:7.1f}  {len(r.entries):7d}  {r.url}"
+        )
+        if r.error:
+            lines.append(f"{'':>33}{r.error}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--no-cache", action="store_true", help="skip conditional requests")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    fetcher = FeedFetcher(
+        max_workers=args.workers,
+        per_host=args.per_host,
+        timeout=args.timeout,
+        cache=None if args.no_cache else FeedCache(),
+    )
+    results = fetcher.fetch_all(args.urls)
+    print(format_timings(results))
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,415 @@
+"""Resumable Google Drive uploads for the generated reports.
+
+Files are sent with the Drive v3 resumable protocol in fixed-size chunks.
+The session URI of an unfinished upload is kept on disk, so a failed chunk
+or a crashed run continues from the last byte Drive acknowledged instead of
+starting over. Batches are uploaded on a small worker pool, and files whose
+MD5 already exists in the target folder are skipped.
+
+OAuth tokens obtained from ``common.gdrive_client_secret`` are cached next
+to the other caches and refreshed only when they expire.
+
+Usage::
+
+    python -m toolbox.gdrive auth
+    python -m toolbox.gdrive upload --skill ai-news-summary report.pdf ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import requests
+
+from toolbox import profiling
+from toolbox.config import ROOT, cache_dir, load_settings, skill_settings
+from toolbox.session import build_session
+
+logger = logging.getLogger(__name__)
+
+DRIVE_API = "https://www.googleapis.com/drive/v3"
+UPLOAD_API = "https://www.googleapis.com/upload/drive/v3"
+AUTH_URI = "https://accounts.google.com/o/oauth2/auth"
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+SCOPE = "https://www.googleapis.com/auth/drive.file"
+
+# Drive requires chunks to be multiples of 256 KiB.
+CHUNK_SIZE = 32 * 256 * 1024
+
+# Refresh this many seconds before the access token actually expires.
+EXPIRY_MARGIN = 60
+
+# Answers worth retrying; anything else but 404/410 fails the upload.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class DriveError(RuntimeError):
+    """A Drive request failed permanently."""
+
+
+class TokenCache:
+    """OAuth credentials for an installed-app client, cached on disk."""
+
+    def __init__(
+        self,
+        client_secret: str | Path,
+        path: str | Path | None = None,
+        *,
+        session: requests.Session | None = None,
+    ) -> None:
+        with open(client_secret, encoding="utf-8") as f:
+            secret = json.load(f)
+        secret = secret.get("installed") or secret.get("web") or secret
+        self.client_id = secret["client_id"]
+        self.client_secret = secret["client_secret"]
+        self.auth_uri = secret.get("auth_uri", AUTH_URI)
+        self.token_uri = secret.get("token_uri", TOKEN_URI)
+        self.path = Path(path) if path else cache_dir() / "gdrive_token.json"
+        self.session = session or build_session()
+        self._lock = threading.Lock()
+        self._token: dict[str, Any] = {}
+        if self.path.exists():
+            self._token = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def _save(self, token: dict[str, Any]) -> None:
+        self._token = token
+        tmp = self.path.with_suffix(".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(token, f)
+        os.replace(tmp, self.path)
+
+    def _grant(self, **params: str) -> None:
+        resp = self.session.post(
+            self.token_uri,
+            data={"client_id": self.client_id, "client_secret": self.client_secret, **params},
+            timeout=30,
+        )
+        if resp.status_code != 200:
+            raise DriveError(f"token request failed: {resp.status_code} {resp.text[:200]}")
+        body = resp.json()
+        self._save(
+            {
+                "access_token": body["access_token"],
+                "refresh_token": body.get("refresh_token") or self._token.get("refresh_token"),
+                "expires_at": time.time() + int(body.get("expires_in", 3600)),
+            }
+        )
+
+    def access_token(self) -> str:
+        """Return a valid access token, refreshing it only when expired."""
+        with self._lock:
+            if self._token.get("access_token") and self._token.get("expires_at", 0) - EXPIRY_MARGIN > time.time():
+                return self._token["access_token"]
+            if not self._token.get("refresh_token"):
+                raise DriveError(f"no refresh token in {self.path}; run: python -m toolbox.gdrive auth")
+            logger.info("refreshing Google Drive access token")
+            self._grant(grant_type="refresh_token", refresh_token=self._token["refresh_token"])
+            return self._token["access_token"]
+
+    def invalidate(self) -> None:
+        """Forget the access token after Drive rejected it."""
+        with self._lock:
+            self._token["expires_at"] = 0
+
+    def authorize(self) -> None:
+        """Run the loopback OAuth flow in a browser and cache the tokens."""
+        codes: list[str] = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                codes.extend(parse_qs(urlsplit(self.path).query).get("code", []))
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b"Authorization complete; you can close this tab.")
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        with HTTPServer(("127.0.0.1", 0), Handler) as server:
+            redirect = f"http://127.0.0.1:{server.server_port}/"
+            url = self.auth_uri + "?" + urlencode(
+                {
+                    "client_id": self.client_id,
+                    "redirect_uri": redirect,
+                    "response_type": "code",
+                    "scope": SCOPE,
+                    "access_type": "offline",
+                    "prompt": "consent",
+                }
+            )
+            print(f"Open this URL to authorize Google Drive access:\n{url}")
+            webbrowser.open(url)
+            while not codes:
+                server.handle_request()
+        with self._lock:
+            self._grant(grant_type="authorization_code", code=codes[0], redirect_uri=redirect)
+
+
+@dataclass
+class UploadResult:
+    path: Path
+    file_id: str | None = None
+    skipped: bool = False
+    resumed_from: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+def file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DriveUploader:
+    """Chunked, resumable uploads into Drive folders."""
+
+    def __init__(
+        self,
+        tokens: TokenCache,
+        *,
+        session: requests.Session | None = None,
+        api_url: str = DRIVE_API,
+        upload_url: str = UPLOAD_API,
+        chunk_size: int = CHUNK_SIZE,
+        state_dir: str | Path | None = None,
+        max_retries: int = 5,
+        timeout: float = 120.0,
+    ) -> None:
+        if chunk_size % (256 * 1024):
+            raise ValueError("chunk_size must be a multiple of 256 KiB")
+        self.tokens = tokens
+        self.session = session or build_session()
+        self.api_url = api_url.rstrip("/")
+        self.upload_url = upload_url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.state_dir = Path(state_dir) if state_dir else cache_dir() / "gdrive_uploads"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._folders: dict[str, dict[str, str]] = {}
+        self._folders_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: dict[str, Any], **kwargs: Any) -> DriveUploader:
+        """Build an uploader from a skill's settings (see :func:`toolbox.config.skill_settings`)."""
+        return cls(TokenCache(ROOT / settings["gdrive_client_secret"]), **kwargs)
+
+    def _request(
+        self, method: str, url: str, *, headers: dict[str, str] | None = None, **kwargs: Any
+    ) -> requests.Response:
+        """Send an authorised request, retrying once with a fresh token on 401."""
+        for _ in range(2):
+            auth = {**(headers or {}), "Authorization": f"Bearer {self.tokens.access_token()}"}
+            resp = self.session.request(method, url, headers=auth, timeout=self.timeout, **kwargs)
+            if resp.status_code != 401:
+                return resp
+            self.tokens.invalidate()
+        return resp
+
+    def existing(self, folder_id: str) -> dict[str, str]:
+        """Return ``{md5: file_id}`` for files in ``folder_id``, listed once per uploader."""
+        with self._folders_lock:
+            if folder_id in self._folders:
+                return self._folders[folder_id]
+            found: dict[str, str] = {}
+            params = {
+                "q": f"'{folder_id}' in parents and trashed = false",
+                "fields": "nextPageToken, files(id, md5Checksum)",
+                "pageSize": 1000,
+            }
+            while True:
+                resp = self._request("GET", f"{self.api_url}/files", params=params)
+                if resp.status_code != 200:
+                    raise DriveError(f"listing {folder_id} failed: {resp.status_code} {resp.text[:200]}")
+                body = resp.json()
+                found.update((f["md5Checksum"], f["id"]) for f in body.get("files", []) if f.get("md5Checksum"))
+                if not body.get("nextPageToken"):
+                    break
+                params["pageToken"] = body["nextPageToken"]
+            self._folders[folder_id] = found
+            return found
+
+    def _state_path(self, md5: str, folder_id: str) -> Path:
+        return self.state_dir / f"{md5}-{folder_id}.json"
+
+    def _start(self, path: Path, folder_id: str, name: str, mime: str, size: int) -> str:
+        resp = self._request(
+            "POST",
+            f"{self.upload_url}/files",
+            params={"uploadType": "resumable", "fields": "id"},
+            headers={"X-Upload-Content-Type": mime, "X-Upload-Content-Length": str(size)},
+            json={"name": name, "parents": [folder_id], "mimeType": mime},
+        )
+        if resp.status_code != 200 or "Location" not in resp.headers:
+            raise DriveError(f"starting upload of {path} failed: {resp.status_code} {resp.text[:200]}")
+        return resp.headers["Location"]
+
+    def _offset(self, session_uri: str, size: int) -> int | None:
+        """Ask Drive how much of the upload it has; ``None`` if the session is gone.
+
+        Transient answers (429, 5xx) raise :class:`requests.HTTPError`, like a
+        dropped connection does, so that the caller can retry the query.
+        """
+        resp = self._request("PUT", session_uri, headers={"Content-Range": f"bytes */{size}"})
+        if resp.status_code == 308:
+            received = resp.headers.get("Range")
+            return int(received.rsplit("-", 1)[1]) + 1 if received else 0
+        if resp.status_code in (200, 201):
+            return size
+        if resp.status_code in (404, 410):
+            return None
+        if resp.status_code in RETRY_STATUSES:
+            raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+        raise DriveError(f"querying upload status failed: {resp.status_code} {resp.text[:200]}")
+
+    def _backoff(self, path: Path, failures: int, error: str) -> int:
+        """Count one more failure of ``path`` and wait before retrying; returns the new count."""
+        failures += 1
+        if failures > self.max_retries:
+            raise DriveError(f"uploading {path} failed after {self.max_retries} retries ({error})")
+        logger.warning("uploading %s: %s, resuming", path.name, error)
+        time.sleep(min(2**failures, 30) * 0.5)
+        return failures
+
+    def upload(
+        self, path: str | Path, folder_id: str, *, name: str | None = None, mime: str = "application/pdf"
+    ) -> UploadResult:
+        """Upload ``path`` into ``folder_id``, resuming a previous attempt if any."""
+        path = Path(path)
+        start = time.monotonic()
+        result = UploadResult(path)
+        md5 = file_md5(path)
+        existing = self.existing(folder_id)
+        if md5 in existing:
+            result.file_id, result.skipped = existing[md5], True
+            logger.info("%s already in Drive folder as %s, skipping", path.name, result.file_id)
+            return result
+
+        size = path.stat().st_size
+        state_path = self._state_path(md5, folder_id)
+        session_uri = None
+        offset: int | None = 0
+        if state_path.exists():
+            session_uri = json.loads(state_path.read_text())["session_uri"]
+            offset = None
+        if session_uri is None:
+            session_uri = self._start(path, folder_id, name or path.name, mime, size)
+            state_path.write_text(json.dumps({"session_uri": session_uri, "path": str(path)}))
+
+        failures = 0
+        resuming = offset is None
+        with open(path, "rb") as f:
+            while True:
+                if offset is None:
+                    # after a crash or a failed chunk, ask Drive what it kept
+                    try:
+                        offset = self._offset(session_uri, size)
+                    except requests.RequestException as exc:
+                        failures = self._backoff(path, failures, f"status query failed ({exc})")
+                        continue
+                    if offset is None:
+                        # only Drive saying so drops the session state
+                        state_path.unlink(missing_ok=True)
+                        if not resuming:
+                            raise DriveError(f"upload session for {path} expired")
+                        session_uri = self._start(path, folder_id, name or path.name, mime, size)
+                        state_path.write_text(json.dumps({"session_uri": session_uri, "path": str(path)}))
+                        offset = 0
+                    if resuming:
+                        result.resumed_from, resuming = offset, False
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                end = offset + len(chunk) - 1
+                headers = {"Content-Range": f"bytes {offset}-{end}/{size}" if chunk else f"bytes */{size}"}
+                try:
+                    resp = self._request("PUT", session_uri, data=chunk, headers=headers)
+                except requests.RequestException as exc:
+                    resp, error = None, str(exc)
+                if resp is not None and resp.status_code in (200, 201):
+                    result.file_id = resp.json()["id"]
+                    break
+                if resp is not None and resp.status_code == 308:
+                    received = resp.headers.get("Range")
+                    kept = int(received.rsplit("-", 1)[1]) + 1 if received else 0
+                    if kept > offset:
+                        failures = 0
+                    else:
+                        # a server that keeps dropping the chunk must not loop forever
+                        failures = self._backoff(path, failures, f"chunk at {offset} not stored")
+                    offset = kept
+                    continue
+                if resp is not None and resp.status_code not in RETRY_STATUSES:
+                    raise DriveError(f"uploading {path} failed: {resp.status_code} {resp.text[:200]}")
+                if resp is not None:
+                    error = f"HTTP {resp.status_code}"
+                failures = self._backoff(path, failures, f"chunk at {offset} failed ({error})")
+                offset = None
+
+        state_path.unlink(missing_ok=True)
+        with self._folders_lock:
+            existing[md5] = result.file_id
+        result.elapsed = time.monotonic() - start
+        profiling.record("gdrive.upload", result.elapsed)
+        logger.info("uploaded %s (%d bytes) in %.2fs", path.name, size, result.elapsed)
+        return result
+
+    def upload_many(
+        self, paths: Iterable[str | Path], folder_id: str, *, workers: int = 4
+    ) -> list[UploadResult]:
+        """Upload ``paths`` concurrently; failures are reported per file."""
+
+        def upload_one(path: str | Path) -> UploadResult:
+            try:
+                return self.upload(path, folder_id)
+            except (DriveError, OSError, requests.RequestException) as exc:
+                logger.error("uploading %s failed: %s", path, exc)
+                return UploadResult(Path(path), error=str(exc))
+
+        paths = list(paths)
+        self.existing(folder_id)  # list the folder once before fanning out
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths))), thread_name_prefix="gdrive") as pool:
+            return list(pool.map(upload_one, paths))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("auth", help="authorize and cache OAuth tokens")
+    upload = sub.add_parser("upload", help="upload files to a skill's Drive folder")
+    upload.add_argument("--skill", required=True)
+    upload.add_argument("--workers", type=int, default=4)
+    upload.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    if args.command == "auth":
+        TokenCache(ROOT / load_settings()["common"]["gdrive_client_secret"]).authorize()
+        return 0
+    settings = skill_settings(args.skill)
+    uploader = DriveUploader.from_settings(settings)
+    results = uploader.upload_many(args.paths, settings["gdrive_folder_id"], workers=args.workers)
+    for r in results:
+        status = "error: " + r.error if r.error else ("skipped" if r.skipped else f"{r.elapsed:.2f}s")
+        print(f"{r.path}: {r.file_id or '-'} {status}")
+    return 0 if all(r.error is None for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+"""Persistent conditional-GET cache for feeds.
+
+Each feed URL maps to its last ``ETag``/``Last-Modified`` validators and the
+already-parsed feed. When the server answers ``304 Not Modified`` the parsed
+feed is loaded from disk, skipping both the download and ``feedparser.parse``.
+
+The cache is a single SQLite database in WAL mode, so the ai/aws/jp-it skills
+can share it even when they run at the same time. Entries are evicted when
+unused for ``ttl`` seconds and, least recently used first, when the total
+payload exceeds ``max_bytes``. A cache that cannot be read or written
+(a corrupt row, a locked database) behaves as a miss; it never fails a fetch.
+
+Usage::
+
+    python -m toolbox.http_cache stats
+    python -m toolbox.http_cache clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping
+
+from toolbox.config import cache_dir
+
+logger = logging.getLogger(__name__)
+
+# what a damaged database or an unpicklable/corrupt payload can raise
+CACHE_ERRORS = (sqlite3.Error, pickle.PickleError, zlib.error, EOFError, ValueError, TypeError, AttributeError)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feeds_accessed_at ON feeds (accessed_at);
+"""
+
+
+@dataclass
+class CacheStats:
+    """Counters for one process; a hit is a 304 served from the cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({ratio:.0%}), {self.evictions} evicted"
+
+
+def _picklable(feed: Any) -> Any:
+    """Return ``feed`` with ``bozo_exception`` replaced by its message.
+
+    feedparser's parse errors (e.g. ``SAXParseException``) can hold closed
+    file objects and do not pickle.
+    """
+    exc = feed.get("bozo_exception") if isinstance(feed, dict) else None
+    if exc is None or isinstance(exc, str):
+        return feed
+    feed = copy.copy(feed)
+    feed["bozo_exception"] = str(exc)
+    return feed
+
+
+class FeedCache:
+    """On-disk cache of parsed feeds keyed by URL."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600,
+    ) -> None:
+        self.path = Path(path) if path else cache_dir() / "feeds.sqlite3"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> FeedCache:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def validators(self, url: str) -> dict[str, str]:
+        """Return conditional request headers for ``url`` (empty if unknown)."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT etag, last_modified FROM feeds WHERE url = ? AND accessed_at > ?",
+                    (url, time.time() - self.ttl),
+                ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("feed cache unreadable for %s: %s", url, exc)
+            return {}
+        if row is None:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def load(self, url: str) -> Any | None:
+        """Return the cached parsed feed for ``url`` after a 304, or ``None``."""
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT payload FROM feeds WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE feeds SET accessed_at = ? WHERE url = ?", (time.time(), url)
+                )
+            feed = pickle.loads(zlib.decompress(row[0]))
+        except CACHE_ERRORS as exc:
+            logger.warning("discarding unreadable cached feed %s: %s", url, exc)
+            return None
+        with self._lock:
+            self.stats.hits += 1
+        return feed
+
+    def store(self, url: str, headers: Mapping[str, str], feed: Any) -> None:
+        """Record a freshly downloaded feed and its validators.
+
+        Responses without ``ETag`` or ``Last-Modified`` are counted as misses
+        but not stored, since they can never be revalidated.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        with self._lock:
+            self.stats.misses += 1
+        if not etag and not last_modified:
+            return
+        try:
+            payload = zlib.compress(pickle.dumps(_picklable(feed), protocol=pickle.HIGHEST_PROTOCOL))
+            now = time.time()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO feeds VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, payload, len(payload), now, now),
+                )
+            self.evict()
+        except CACHE_ERRORS as exc:
+            logger.warning("not caching feed %s: %s", url, exc)
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries beyond ``max_bytes``."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM feeds WHERE accessed_at <= ?", (time.time() - self.ttl,)
+            ).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM feeds").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                rows = self._conn.execute("SELECT url, size FROM feeds ORDER BY accessed_at")
+                for url, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((url,))
+                    total -= size
+                self._conn.executemany("DELETE FROM feeds WHERE url = ?", victims)
+                removed += len(victims)
+            self.stats.evictions += removed
+        if removed:
+            logger.debug("evicted %d cached feeds", removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM feeds")
+            self._conn.execute("VACUUM")
+
+    def summary(self) -> tuple[int, int]:
+        """Return ``(entries, payload_bytes)`` currently on disk."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM feeds"
+            ).fetchone()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["stats", "clear", "evict"])
+    parser.add_argument("--path", help="cache database (default: feeds.sqlite3 in the cache dir)")
+    args = parser.parse_args(argv)
+
+    with FeedCache(args.path) as cache:
+        if args.command == "clear":
+            cache.clear()
+        elif args.command == "evict":
+            print(f"evicted {cache.evict()} entries")
+        entries, size = cache.summary()
+        print(f"{cache.path}: {entries} feeds, {size / 1024:.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
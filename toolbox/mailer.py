@@ -0,0 +1,262 @@
+"""Bulk report e-mail over a pool of authenticated SMTP connections.
+
+``/report-email`` used to open, STARTTLS and log in for every message. Here
+a few connections are opened once and reused for the whole recipient list;
+each is recycled after ``max_messages`` sends and reopened once when the
+server drops it. The PDF attachment is base64-encoded once and the same
+MIME part is shared by every message.
+
+Usage::
+
+    python -m toolbox.mailer --to a@example.com,b@example.com \\
+        --subject "Daily digest" --attach report.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import mimetypes
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.mime.application import MIMEApplication
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr, formatdate, make_msgid
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+from toolbox import profiling
+from toolbox.config import skill_settings
+
+logger = logging.getLogger(__name__)
+
+SKILL = "report-email"
+
+
+class _Connection:
+    """An authenticated SMTP session and the number of messages it sent."""
+
+    def __init__(self, smtp: smtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.sent = 0
+
+
+def _reconnectable(exc: OSError) -> bool:
+    """Whether ``exc`` means the connection, not the message, is at fault."""
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == 421
+    return not isinstance(exc, smtplib.SMTPException)
+
+
+class SMTPPool:
+    """A fixed number of reusable, logged-in SMTP connections."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str | None = None,
+        password: str | None = None,
+        *,
+        size: int = 3,
+        max_messages: int = 50,
+        starttls: bool = True,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self.starttls = starttls
+        self.timeout = timeout
+        self.connects = 0
+        self._idle: queue.LifoQueue[_Connection | None] = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)  # opened lazily on first use
+        self._lock = threading.Lock()
+        self._context = ssl.create_default_context()
+
+    @classmethod
+    def from_settings(cls, settings: Mapping[str, Any], **kwargs: Any) -> SMTPPool:
+        return cls(
+            settings["smtp_server"],
+            int(settings["smtp_port"]),
+            settings.get("sender_email"),
+            settings.get("sender_password"),
+            **kwargs,
+        )
+
+    def _open(self) -> _Connection:
+        with profiling.timed("smtp.connect"):
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    smtp.starttls(context=self._context)
+                if self.user and self.password:
+                    smtp.login(self.user, self.password)
+            except BaseException:
+                smtp.close()
+                raise
+        with self._lock:
+            self.connects += 1
+        return _Connection(smtp)
+
+    @staticmethod
+    def _close(conn: _Connection | None) -> None:
+        if conn is None:
+            return
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+    def send(self, msg: MIMEBase, to_addrs: list[str]) -> None:
+        """Send ``msg`` on a pooled connection, reconnecting once if it died."""
+        conn = self._idle.get()
+        try:
+            for attempt in (1, 2):
+                if conn is None or conn.sent >= self.max_messages:
+                    self._close(conn)
+                    conn = None
+                    conn = self._open()
+                try:
+                    with profiling.timed("smtp.send"):
+                        conn.smtp.send_message(msg, to_addrs=to_addrs)
+                    conn.sent += 1
+                    return
+                except OSError as exc:  # smtplib.SMTPException is an OSError
+                    if attempt == 2 or not _reconnectable(exc):
+                        raise
+                    logger.info("SMTP connection lost (%s), reconnecting", exc)
+                    self._close(conn)
+                    conn = None
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        for _ in range(self.size):
+            self._close(self._idle.get())
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    def __enter__(self) -> SMTPPool:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def attachment_part(path: str | Path) -> MIMEApplication:
+    """Encode ``path`` once as a MIME part that messages can share."""
+    path = Path(path)
+    mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    part = MIMEApplication(path.read_bytes(), _subtype=mime.split("/", 1)[1])
+    part.add_header("Content-Disposition", "attachment", filename=path.name)
+    return part
+
+
+def build_message(
+    sender: str,
+    recipient: str,
+    subject: str,
+    body: str,
+    attachments: Iterable[MIMEBase] = (),
+) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid()
+    msg.attach(MIMEText(body, "plain", "utf-8"))
+    for part in attachments:
+        msg.attach(part)
+    return msg
+
+
+@dataclass
+class BulkResult:
+    sent: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    connects: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+def send_bulk(
+    pool: SMTPPool,
+    sender: str,
+    recipients: Iterable[str],
+    subject: str,
+    body: str,
+    attachments: Iterable[str | Path] = (),
+) -> BulkResult:
+    """Send one message per recipient over ``pool``; failures are collected."""
+    parts = [attachment_part(path) for path in attachments]
+    result = BulkResult()
+    lock = threading.Lock()
+    connects_before = pool.connects
+
+    def send_one(recipient: str) -> None:
+        msg = build_message(sender, recipient, subject, body, parts)
+        try:
+            pool.send(msg, [recipient])
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.warning("sending to %s failed: %s", recipient, exc)
+            with lock:
+                result.failed[recipient] = str(exc)
+        else:
+            with lock:
+                result.sent += 1
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="smtp") as executor:
+        list(executor.map(send_one, recipients))
+    result.elapsed = time.monotonic() - start
+    result.connects = pool.connects - connects_before
+    logger.info(
+        "sent %d messages (%d failed) in %.2fs, %.1f msg/s over %d connections",
+        result.sent,
+        len(result.failed),
+        result.elapsed,
+        result.rate,
+        result.connects,
+    )
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--to", help="comma-separated recipients (default: default_recipient)")
+    parser.add_argument("--subject", required=True)
+    parser.add_argument("--body", default="")
+    parser.add_argument("--attach", action="append", default=[])
+    parser.add_argument("--connections", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    settings = skill_settings(SKILL)
+    recipients = [r.strip() for r in (args.to or settings["default_recipient"]).split(",") if r.strip()]
+    sender = formataddr((settings.get("sender_name", ""), settings["sender_email"]))
+    with SMTPPool.from_settings(settings, size=args.connections) as pool:
+        result = send_bulk(pool, sender, recipients, args.subject, args.body, args.attach)
+    print(f"sent {result.sent}/{len(recipients)} in {result.elapsed:.2f}s ({result.rate:.1f} msg/s)")
+    return 0 if not result.failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
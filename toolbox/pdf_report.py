@@ -0,0 +1,247 @@
+"""Streaming PDF digests for the summary skills.
+
+Articles are consumed from an iterator and turned into flowables only when
+reportlab asks for them, so the story is never materialised in memory.
+Thumbnails are downscaled to the target DPI once and kept in a
+content-addressed JPEG cache; because reportlab names image XObjects after
+the file path, an image that repeats within a document is embedded once.
+
+Usage::
+
+    from toolbox.pdf_report import ReportItem, build_report
+
+    build_report("digest.pdf", "AI News", (ReportItem(...) for ... in ...))
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from PIL import Image as PILImage
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer
+
+from toolbox import profiling
+from toolbox.config import cache_dir
+
+logger = logging.getLogger(__name__)
+
+FONT_NAME = "HeiseiKakuGo-W5"
+
+# How many flowables reportlab may look ahead (keepWithNext chains).
+LOOKAHEAD = 32
+
+
+@functools.lru_cache(maxsize=None)
+def register_fonts() -> str:
+    """Register the Japanese CID font once per process and return its name."""
+    pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+    return FONT_NAME
+
+
+@dataclass
+class ReportItem:
+    """One article in a digest. ``image`` is raw bytes or a path."""
+
+    title: str
+    link: str
+    summary: str
+    source: str = ""
+    published: str = ""
+    image: bytes | str | Path | None = None
+
+
+class ThumbnailCache:
+    """Content-addressed cache of downscaled, recompressed JPEG thumbnails."""
+
+    def __init__(
+        self, directory: str | Path | None = None, *, dpi: int = 150, quality: int = 80
+    ) -> None:
+        self.directory = Path(directory) if directory else cache_dir() / "thumbnails"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dpi = dpi
+        self.quality = quality
+
+    def thumbnail(
+        self, image: bytes | str | Path, max_width: float, max_height: float
+    ) -> Path | None:
+        """Return a JPEG fitting ``max_width`` x ``max_height`` points at ``dpi``.
+
+        Returns ``None`` if the source cannot be read or decoded.
+        """
+        try:
+            data = image if isinstance(image, bytes) else Path(image).read_bytes()
+        except OSError as exc:
+            logger.warning("skipping unreadable image: %s", exc)
+            return None
+        box = (round(max_width / 72 * self.dpi), round(max_height / 72 * self.dpi))
+        digest = hashlib.sha256(data)
+        digest.update(f"{box[0]}x{box[1]}q{self.quality}".encode())
+        path = self.directory / f"{digest.hexdigest()}.jpg"
+        if path.exists():
+            return path
+        try:
+            with profiling.timed("pdf.thumbnail"), PILImage.open(io.BytesIO(data)) as img:
+                img.draft("RGB", box)  # lets JPEG decoding skip full resolution
+                img.thumbnail(box, PILImage.Resampling.LANCZOS)
+                if img.mode in ("RGBA", "LA", "P"):
+                    img = img.convert("RGBA")
+                    background = PILImage.new("RGB", img.size, "white")
+                    background.paste(img, mask=img.getchannel("A"))
+                    img = background
+                elif img.mode != "RGB":
+                    img = img.convert("RGB")
+                encoded = io.BytesIO()
+                img.save(encoded, "JPEG", quality=self.quality, optimize=True)
+        except (OSError, ValueError, PILImage.DecompressionBombError) as exc:
+            logger.warning("skipping undecodable image: %s", exc)
+            return None
+        # concurrent writers race harmlessly: both produce the same bytes
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as out:
+            out.write(encoded.getbuffer())
+        os.replace(tmp, path)
+        return path
+
+
+class LazyStory:
+    """List-like view over a flowable iterator, as consumed by ``doc.build``.
+
+    reportlab only ever touches the front of the story (pops, peeks for
+    ``keepWithNext`` and pushes back split parts), so a short buffer is
+    enough; ``len`` reports the buffered items and is zero only at the end.
+    """
+
+    def __init__(self, flowables: Iterable[Flowable], lookahead: int = LOOKAHEAD) -> None:
+        self._source: Iterator[Flowable] | None = iter(flowables)
+        self._buffer: list[Flowable] = []
+        self._lookahead = lookahead
+
+    def _fill(self, n: int) -> None:
+        while self._source is not None and len(self._buffer) < n:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self) -> int:
+        self._fill(self._lookahead)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else self._lookahead)
+        elif index >= 0:
+            self._fill(index + 1)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._buffer[index] = value
+
+    def __delitem__(self, index) -> None:
+        self._fill(index.stop if isinstance(index, slice) and index.stop else 1)
+        del self._buffer[index]
+
+    def insert(self, index: int, value: Flowable) -> None:
+        self._buffer.insert(index, value)
+
+
+class StreamingReport:
+    """Render :class:`ReportItem` streams into a PDF digest."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        title: str,
+        *,
+        thumbnails: ThumbnailCache | None = None,
+        image_width: float = 60 * mm,
+        image_height: float = 40 * mm,
+    ) -> None:
+        self.path = Path(path)
+        self.title = title
+        self.thumbnails = thumbnails or ThumbnailCache()
+        self.image_width = image_width
+        self.image_height = image_height
+        font = register_fonts()
+        self.styles = {
+            "title": ParagraphStyle("title", fontName=font, fontSize=18, leading=24, spaceAfter=6 * mm),
+            "heading": ParagraphStyle("heading", fontName=font, fontSize=12, leading=16, keepWithNext=True),
+            "meta": ParagraphStyle("meta", fontName=font, fontSize=8, leading=11, textColor="#666666", keepWithNext=True),
+            "body": ParagraphStyle("body", fontName=font, fontSize=10, leading=15, alignment=TA_LEFT),
+        }
+        self._sizes: dict[Path, tuple[float, float]] = {}
+        self.count = 0
+
+    def _image(self, item: ReportItem) -> Image | None:
+        if item.image is None:
+            return None
+        path = self.thumbnails.thumbnail(item.image, self.image_width, self.image_height)
+        if path is None:
+            return None
+        size = self._sizes.get(path)
+        if size is None:
+            with PILImage.open(path) as img:
+                w, h = img.size
+            scale = min(self.image_width / w, self.image_height / h)
+            size = self._sizes[path] = (w * scale, h * scale)
+        image = Image(str(path), width=size[0], height=size[1], lazy=2)
+        image.hAlign = "LEFT"
+        return image
+
+    def story(self, items: Iterable[ReportItem]) -> Iterator[Flowable]:
+        """Yield the flowables for ``items`` one article at a time."""
+        yield Paragraph(escape(self.title), self.styles["title"])
+        for item in items:
+            self.count += 1
+            title = f'<a href="{escape(item.link)}">{escape(item.title)}</a>'
+            yield Paragraph(title, self.styles["heading"])
+            meta = " / ".join(escape(part) for part in (item.source, item.published) if part)
+            if meta:
+                yield Paragraph(meta, self.styles["meta"])
+            image = self._image(item)
+            if image is not None:
+                yield image
+            yield Paragraph(escape(item.summary).replace("\n", "<br/>"), self.styles["body"])
+            yield Spacer(1, 5 * mm)
+
+    def build(self, items: Iterable[ReportItem]) -> int:
+        """Write the PDF and return the number of articles rendered."""
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        doc = SimpleDocTemplate(
+            str(self.path),
+            pagesize=A4,
+            title=self.title,
+            leftMargin=15 * mm,
+            rightMargin=15 * mm,
+            topMargin=15 * mm,
+            bottomMargin=15 * mm,
+        )
+        doc.build(LazyStory(self.story(items)))
+        logger.info("rendered %d articles to %s", self.count, self.path)
+        return self.count
+
+
+def build_report(
+    path: str | Path,
+    title: str,
+    items: Iterable[ReportItem],
+    thumbnails: ThumbnailCache | None = None,
+) -> int:
+    """Render ``items`` into ``path``; see :class:`StreamingReport`."""
+    return StreamingReport(path, title, thumbnails=thumbnails).build(items)
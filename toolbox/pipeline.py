@@ -0,0 +1,384 @@
+"""Run several summary skills in one process over shared stages.
+
+Each skill goes through ``fetch → dedup → extract → summarize → render →
+deliver`` on its own thread. Every stage has a concurrency limit shared by
+all skills, so one skill's network-bound fetch overlaps another's
+CPU-bound rendering while, say, only one PDF is rendered at a time. The
+HTTP pool, feed cache, article index, thumbnail cache, font registration
+and Slack queues are created once and shared.
+
+Deduplication against the article index runs before extraction so already
+handled entries never cost an HTML fetch. Entries are recorded as handled
+only once delivery succeeds; a ``--no-deliver`` run reads the index but
+never writes to it, so it does not use up articles.
+
+Summaries default to the article's lead text; pass ``summarizer`` to plug
+in a real one.
+
+With ``--profile`` (or ``TOOLBOX_PROFILE``) every stage is also reported to
+:mod:`toolbox.profiling` under the skill's name.
+
+Usage::
+
+    python -m toolbox.pipeline ai-news-summary aws-blog-summary jp-it-news-summary
+    python -m toolbox.pipeline --no-deliver --limit render=1 --limit fetch=3
+    python -m toolbox.pipeline --no-deliver --profile profile.json --cprofile
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+import requests
+from bs4 import BeautifulSoup
+
+from toolbox import extract, profiling
+from toolbox.article_index import ArticleIndex
+from toolbox.config import ROOT, skill_settings
+from toolbox.feeds import FeedFetcher
+from toolbox.gdrive import DriveUploader
+from toolbox.http_cache import FeedCache
+from toolbox.pdf_report import ReportItem, StreamingReport, ThumbnailCache, register_fonts
+from toolbox.session import build_session
+from toolbox.slack import SlackClient, SlackDispatcher, item_blocks
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "dedup", "extract", "summarize", "render", "deliver")
+
+DEFAULT_LIMITS = {
+    "fetch": 3,
+    "dedup": 1,
+    "extract": 2,
+    "summarize": 3,
+    "render": 1,
+    "deliver": 2,
+}
+
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+SUMMARY_CHARS = 400
+
+
+@dataclass(frozen=True)
+class SkillSpec:
+    name: str
+    title: str
+    feeds: tuple[str, ...]
+
+
+# Defaults; a ``feeds`` list in the skill's settings replaces them.
+SKILLS = {
+    spec.name: spec
+    for spec in (
+        SkillSpec(
+            "ai-news-summary",
+            "AI News",
+            (
+                "https://huggingface.co/blog/feed.xml",
+                "https://openai.com/news/rss.xml",
+                "https://blog.google/technology/ai/rss/",
+            ),
+        ),
+        SkillSpec(
+            "aws-blog-summary",
+            "AWS Blog",
+            (
+                "https://aws.amazon.com/blogs/aws/feed/",
+                "https://aws.amazon.com/about-aws/whats-new/recent/feed/",
+            ),
+        ),
+        SkillSpec(
+            "jp-it-news-summary",
+            "国内ITニュース",
+            (
+                "https://rss.itmedia.co.jp/rss/2.0/news_bursts.xml",
+                "https://gigazine.net/news/rss_2.0/",
+                "https://www.publickey1.jp/atom.xml",
+            ),
+        ),
+    )
+}
+
+
+@dataclass
+class Article:
+    entry: Mapping[str, Any]
+    source: str
+    page: extract.Extracted | None = None
+    image: bytes | None = None
+    summary: str = ""
+
+    @property
+    def title(self) -> str:
+        return self.entry.get("title") or (self.page.title if self.page else "") or self.link
+
+    @property
+    def link(self) -> str:
+        return self.entry.get("link", "")
+
+
+@dataclass
+class StageTiming:
+    wait: float = 0.0
+    run: float = 0.0
+    items: int = 0
+
+
+@dataclass
+class SkillRun:
+    spec: SkillSpec
+    settings: dict[str, Any]
+    articles: list[Article] = field(default_factory=list)
+    report: Path | None = None
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    error: str | None = None
+
+
+def lead_summary(article: Article) -> str:
+    """Default summarizer: the feed summary or the article's lead paragraphs."""
+    text = ""
+    if article.page is not None:
+        text = article.page.lead or article.page.description
+    if not text:
+        text = BeautifulSoup(article.entry.get("summary", ""), "html.parser").get_text(" ", strip=True)
+    text = " ".join(text.split())
+    return text if len(text) <= SUMMARY_CHARS else text[: SUMMARY_CHARS - 1] + "…"
+
+
+class Pipeline:
+    """Shared resources and stage scheduling for a multi-skill run."""
+
+    def __init__(
+        self,
+        *,
+        limits: Mapping[str, int] | None = None,
+        summarizer: Callable[[Article], str] = lead_summary,
+        output_dir: str | Path = ROOT / "reports",
+        deliver: bool = True,
+        max_age_hours: float = 24.0,
+        extract_workers: int = 16,
+        images: bool = True,
+    ) -> None:
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._slots = {stage: threading.BoundedSemaphore(n) for stage, n in self.limits.items()}
+        self.summarizer = summarizer
+        self.output_dir = Path(output_dir)
+        self.deliver = deliver
+        self.max_age = max_age_hours * 3600
+        self.images = images
+        self.session = build_session(pool_maxsize=extract_workers)
+        self.fetcher = FeedFetcher(self.session, cache=FeedCache())
+        self.index = ArticleIndex()
+        self.thumbnails = ThumbnailCache()
+        self.dispatcher = SlackDispatcher()
+        self._extract_pool = ThreadPoolExecutor(extract_workers, thread_name_prefix="extract")
+        self._drive: dict[str, DriveUploader] = {}
+        self._drive_lock = threading.Lock()
+        register_fonts()
+
+    def close(self) -> None:
+        self.dispatcher.close()
+        self._extract_pool.shutdown()
+        self.index.close()
+        self.fetcher.cache.close()
+
+    def __enter__(self) -> Pipeline:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _settings(self, skill: str) -> dict[str, Any]:
+        try:
+            return skill_settings(skill)
+        except FileNotFoundError:
+            if self.deliver:
+                raise
+            return {}
+
+    def run(self, skills: list[str]) -> list[SkillRun]:
+        """Run ``skills`` concurrently and return their results in order."""
+        runs = []
+        for name in skills:
+            settings = self._settings(name)
+            spec = SKILLS[name]
+            if settings.get("feeds"):
+                spec = SkillSpec(spec.name, spec.title, tuple(settings["feeds"]))
+            runs.append(SkillRun(spec, settings))
+        with ThreadPoolExecutor(len(runs), thread_name_prefix="skill") as pool:
+            list(pool.map(self._run_skill, runs))
+        return runs
+
+    def _run_skill(self, run: SkillRun) -> None:
+        for stage in STAGES:
+            timing = run.timings[stage] = StageTiming()
+            queued = time.perf_counter()
+            with self._slots[stage], profiling.timed(stage, run.spec.name) as sample:
+                started = time.perf_counter()
+                timing.wait = started - queued
+                try:
+                    getattr(self, f"_{stage}")(run)
+                except Exception as exc:
+                    logger.exception("%s: %s stage failed", run.spec.name, stage)
+                    run.error = f"{stage}: {exc}"
+                finally:
+                    timing.run = time.perf_counter() - started
+                    timing.items = sample.items = len(run.articles)
+            if run.error or not run.articles:
+                break
+
+    def _fetch(self, run: SkillRun) -> None:
+        cutoff = time.time() - self.max_age
+        for result in self.fetcher.fetch_all(run.spec.feeds):
+            source = result.feed.feed.get("title", "") if result.feed else ""
+            for entry in result.entries:
+                stamp = entry.get("published_parsed") or entry.get("updated_parsed")
+                if stamp is None or calendar.timegm(stamp) >= cutoff:
+                    run.articles.append(Article(entry, source))
+
+    def _dedup(self, run: SkillRun) -> None:
+        fresh = {id(e) for e in self.index.new_entries(run.spec.name, (a.entry for a in run.articles))}
+        run.articles = [a for a in run.articles if id(a.entry) in fresh]
+        if self.deliver:
+            self.index.mark(run.spec.name, (a.entry for a in run.articles), "seen")
+
+    def _extract_one(self, article: Article, skill: str) -> None:
+        try:
+            with profiling.timed("extract.article", skill):
+                article.page = extract.fetch_article(article.link, self.session)
+        except requests.RequestException as exc:
+            logger.warning("extracting %s failed: %s", article.link, exc)
+            return
+        if self.images and article.page.image:
+            try:
+                article.image = self._fetch_image(article.page.image)
+            except (requests.RequestException, ValueError) as exc:
+                logger.debug("image %s failed: %s", article.page.image, exc)
+
+    def _fetch_image(self, url: str) -> bytes | None:
+        """Download ``url``, giving up as soon as it is known to exceed ``MAX_IMAGE_BYTES``."""
+        with self.session.get(url, timeout=10, stream=True) as resp:
+            if not resp.ok or int(resp.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+                return None
+            data = bytearray()
+            for chunk in resp.iter_content(extract.CHUNK_SIZE):
+                data += chunk
+                if len(data) > MAX_IMAGE_BYTES:
+                    return None
+        return bytes(data)
+
+    def _extract(self, run: SkillRun) -> None:
+        articles = [a for a in run.articles if a.link]
+        list(self._extract_pool.map(self._extract_one, articles, [run.spec.name] * len(articles)))
+
+    def _summarize(self, run: SkillRun) -> None:
+        for article in run.articles:
+            article.summary = self.summarizer(article)
+
+    def _render(self, run: SkillRun) -> None:
+        stamp = time.strftime("%Y%m%d-%H%M")
+        run.report = self.output_dir / f"{run.spec.name}-{stamp}.pdf"
+        items = (
+            ReportItem(a.title, a.link, a.summary, a.source, a.entry.get("published", ""), a.image)
+            for a in run.articles
+        )
+        StreamingReport(run.report, run.spec.title, thumbnails=self.thumbnails).build(items)
+
+    def _slack_client(self, settings: Mapping[str, Any]) -> SlackClient:
+        return SlackClient.from_settings(settings, session=self.session)
+
+    def _drive_uploader(self, settings: Mapping[str, Any]) -> DriveUploader:
+        with self._drive_lock:
+            key = settings["gdrive_client_secret"]
+            if key not in self._drive:
+                self._drive[key] = DriveUploader.from_settings(settings, session=self.session)
+            return self._drive[key]
+
+    def _deliver(self, run: SkillRun) -> None:
+        if not self.deliver:
+            return
+        settings = run.settings
+        if settings.get("slack_bot_token") or settings.get("slack_webhook_url"):
+            client = self._slack_client(settings)
+            channel = settings.get("slack_channel_id")
+            blocks = (item_blocks(a.title, a.link, a.summary, a.source) for a in run.articles)
+            futures = self.dispatcher.post_digest(client, channel, run.spec.title, blocks)
+            if client.token and channel:
+                client.upload_file(run.report, channel, title=run.report.name)
+            for future in futures:
+                future.result()
+        if settings.get("gdrive_folder_id") and settings.get("gdrive_client_secret"):
+            self._drive_uploader(settings).upload(run.report, settings["gdrive_folder_id"])
+        # only now are the entries done; a failure above leaves them for the next run
+        for stage in ("summarized", "posted"):
+            self.index.mark(run.spec.name, (a.entry for a in run.articles), stage)
+
+
+def format_breakdown(runs: list[SkillRun], wall: float) -> str:
+    """Render per-skill, per-stage timings plus the overall wall time."""
+    lines = [f"{'skill':<20} {'stage':<10} {'items':>6} {'wait s':>8} {'run s':>8}"]
+    busy = 0.0
+    for run in runs:
+        for stage, t in run.timings.items():
+            lines.append(f"{run.spec.name:<20} {stage:<10} {t.items:6d} {t.wait:8.2f} {t.run:8.2f}")
+            busy += t.run
+        if run.error:
+            lines.append(f"{run.spec.name:<20} error: {run.error}")
+    lines.append(f"stage time {busy:.2f}s, wall {wall:.2f}s")
+    return "\n".join(lines)
+
+
+def _limit(value: str) -> tuple[str, int]:
+    stage, _, n = value.partition("=")
+    if stage not in STAGES or not n.isdigit() or int(n) < 1:
+        raise argparse.ArgumentTypeError(f"expected STAGE=N with STAGE in {', '.join(STAGES)}")
+    return stage, int(n)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("skills", nargs="*", metavar="SKILL", help=f"default: all of {', '.join(SKILLS)}")
+    parser.add_argument("--hours", type=float, default=24.0, help="collect entries this recent")
+    parser.add_argument("--limit", type=_limit, action="append", default=[], metavar="STAGE=N")
+    parser.add_argument("--output-dir", type=Path, default=ROOT / "reports")
+    parser.add_argument("--no-deliver", action="store_true", help="render only, skip Slack/Drive")
+    parser.add_argument("--no-images", action="store_true")
+    parser.add_argument("--profile", type=Path, metavar="JSON", help="write a toolbox.profiling report")
+    parser.add_argument("--cprofile", action="store_true", help="with --profile: add cProfile stats")
+    parser.add_argument("--tracemalloc", action="store_true", help="with --profile: trace allocations")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.skills) - set(SKILLS))
+    if unknown:
+        parser.error(f"unknown skill(s): {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(threadName)s %(name)s: %(message)s")
+    profiler = None
+    if args.profile:
+        profiler = profiling.Profiler(args.profile, cprofile=args.cprofile, tracemalloc=args.tracemalloc)
+        previous = profiling.install(profiler)
+    start = time.perf_counter()
+    with Pipeline(
+        limits=dict(args.limit),
+        output_dir=args.output_dir,
+        deliver=not args.no_deliver,
+        max_age_hours=args.hours,
+        images=not args.no_images,
+    ) as pipeline:
+        runs = pipeline.run(args.skills or list(SKILLS))
+    print(format_breakdown(runs, time.perf_counter() - start))
+    if profiler is not None:
+        profiler.write()
+        profiling.install(previous)
+    return 1 if any(run.error for run in runs) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
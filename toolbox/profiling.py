@@ -0,0 +1,268 @@
+"""Opt-in instrumentation: stage timers, cProfile and tracemalloc.
+
+Nothing is recorded unless a :class:`Profiler` is installed; the hooks in
+the other modules (:func:`timed`, :func:`record`) are then no-ops. Setting
+``TOOLBOX_PROFILE`` installs one for any ``python -m toolbox.*`` run and
+writes the JSON report there at exit::
+
+    TOOLBOX_PROFILE=profile.json TOOLBOX_PROFILE_CPROFILE=1 \\
+        python -m toolbox.pipeline --no-deliver
+
+``TOOLBOX_PROFILE_TRACEMALLOC=1`` adds allocation tracing. With cProfile
+the merged stats are also dumped next to the report (``profile.prof``) for
+``pstats`` or snakeviz.
+
+The report lists, per timer name and skill, the number of calls and items,
+total time, p50/p95/max latency and items per second, plus peak RSS.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 15
+
+
+@dataclass
+class Sample:
+    """One timed call; ``items`` may be set inside the ``with`` block."""
+
+    items: int = 1
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+def max_rss_bytes() -> int:
+    """Peak resident set size; without ``resource`` (Windows) the traced peak, or 0."""
+    try:
+        import resource
+    except ImportError:
+        import tracemalloc as tm
+
+        return tm.get_traced_memory()[1] if tm.is_tracing() else 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Profiler:
+    """Collects timings and, optionally, cProfile and tracemalloc data."""
+
+    def __init__(
+        self,
+        report_path: str | Path | None = None,
+        *,
+        cprofile: bool = False,
+        tracemalloc: bool = False,
+    ) -> None:
+        self.report_path = Path(report_path) if report_path else None
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._samples: dict[tuple[str, str], list[float]] = defaultdict(list)
+        self._items: dict[tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = None
+        self.extra: dict[str, Any] = {}
+        if tracemalloc:
+            import tracemalloc as tm
+
+            if not tm.is_tracing():
+                tm.start()
+
+    def record(self, name: str, seconds: float, skill: str = "", items: int = 1) -> None:
+        with self._lock:
+            self._samples[name, skill].append(seconds)
+            self._items[name, skill] += items
+
+    @contextlib.contextmanager
+    def timer(self, name: str, skill: str = "", items: int = 1) -> Iterator[Sample]:
+        """Time the block; cProfile covers the outermost timer of each thread."""
+        sample = Sample(items)
+        prof = self._profile_start() if self.cprofile else None
+        start = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            self.record(name, time.perf_counter() - start, skill, sample.items)
+            if prof is not None:
+                self._profile_stop(prof)
+
+    def _profile_start(self):
+        if getattr(self._local, "active", False):
+            return None
+        import cProfile
+
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # another profiler owns this thread (or, on 3.12+, the process)
+            return None
+        self._local.active = True
+        return prof
+
+    def _profile_stop(self, prof) -> None:
+        import pstats
+
+        prof.disable()
+        self._local.active = False
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(prof, stream=io.StringIO())
+            else:
+                self._stats.add(prof)
+
+    def stages(self) -> list[dict[str, Any]]:
+        rows = []
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+            items = dict(self._items)
+        for (name, skill), values in sorted(samples.items()):
+            total = sum(values)
+            rows.append(
+                {
+                    "name": name,
+                    "skill": skill,
+                    "calls": len(values),
+                    "items": items[name, skill],
+                    "total_s": total,
+                    "p50_s": percentile(values, 50),
+                    "p95_s": percentile(values, 95),
+                    "max_s": max(values),
+                    "items_per_s": items[name, skill] / total if total else 0.0,
+                }
+            )
+        return rows
+
+    def _cprofile_report(self) -> dict[str, Any]:
+        if self._stats is None:
+            return {}
+        report: dict[str, Any] = {}
+        if self.report_path:
+            path = self.report_path.with_suffix(".prof")
+            self._stats.dump_stats(path)
+            report["file"] = str(path)
+        # own time: cumulative times of wrappers add up across threads
+        top = sorted(self._stats.stats.items(), key=lambda kv: kv[1][2], reverse=True)
+        report["top"] = [
+            {
+                "function": f"{file}:{line}({func})",
+                "calls": nc,
+                "tottime_s": tt,
+                "cumtime_s": ct,
+            }
+            for (file, line, func), (cc, nc, tt, ct, _) in top[:TOP_FUNCTIONS]
+        ]
+        return report
+
+    def _tracemalloc_report(self) -> dict[str, Any]:
+        import tracemalloc as tm
+
+        if not tm.is_tracing():
+            return {}
+        current, peak = tm.get_traced_memory()
+        snapshot = tm.take_snapshot().filter_traces(
+            [tm.Filter(False, tm.__file__), tm.Filter(False, "<frozen importlib._bootstrap>")]
+        )
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"where": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ],
+        }
+
+    def report(self) -> dict[str, Any]:
+        memory: dict[str, Any] = {"max_rss_bytes": max_rss_bytes()}
+        if self.tracemalloc:
+            memory["tracemalloc"] = self._tracemalloc_report()
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+            "wall_s": time.perf_counter() - self._start,
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stages": self.stages(),
+            "memory": memory,
+            "cprofile": self._cprofile_report(),
+            **self.extra,
+        }
+
+    def write(self, path: str | Path | None = None) -> Path:
+        path = Path(path or self.report_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info("profile report written to %s", path)
+        return path
+
+
+_current: Profiler | None = None
+
+
+def install(profiler: Profiler | None) -> Profiler | None:
+    """Make ``profiler`` the process-wide target of the hooks; returns the previous one."""
+    global _current
+    previous, _current = _current, profiler
+    return previous
+
+
+def current() -> Profiler | None:
+    return _current
+
+
+def timed(name: str, skill: str = "", items: int = 1) -> contextlib.AbstractContextManager[Sample]:
+    """Time a block against the installed profiler, if any."""
+    if _current is None:
+        return contextlib.nullcontext(Sample(items))
+    return _current.timer(name, skill, items)
+
+
+def record(name: str, seconds: float, skill: str = "", items: int = 1) -> None:
+    if _current is not None:
+        _current.record(name, seconds, skill, items)
+
+
+def _flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+def enable_from_env() -> Profiler | None:
+    """Install a profiler writing to ``$TOOLBOX_PROFILE`` at exit, if set."""
+    path = os.environ.get("TOOLBOX_PROFILE")
+    if not path or _current is not None:
+        return _current
+    profiler = Profiler(
+        path,
+        cprofile=_flag("TOOLBOX_PROFILE_CPROFILE"),
+        tracemalloc=_flag("TOOLBOX_PROFILE_TRACEMALLOC"),
+    )
+    install(profiler)
+    atexit.register(profiler.write)
+    return profiler
@@ -0,0 +1,64 @@
+"""Pooled HTTP sessions shared by the skills."""
+
+from __future__ import annotations
+
+import functools
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from toolbox import profiling
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0 Safari/537.36"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def default_user_agent() -> str:
+    """Return a browser User-Agent, initialising fake-useragent only once."""
+    with profiling.timed("startup.user_agent"):
+        try:
+            from fake_useragent import UserAgent
+        except ImportError:
+            return FALLBACK_USER_AGENT
+        try:
+            return UserAgent(browsers=["Chrome"], os=["Linux", "Mac OS X"]).random
+        except Exception:  # fake-useragent raises bare Exceptions on data errors
+            logger.debug("fake-useragent unavailable, using fallback UA", exc_info=True)
+            return FALLBACK_USER_AGENT
+
+
+def build_session(
+    pool_connections: int = 32,
+    pool_maxsize: int = 8,
+    retries: int = 2,
+    user_agent: str | None = None,
+) -> requests.Session:
+    """Create a keep-alive session with a bounded connection pool.
+
+    ``pool_connections`` is the number of hosts kept in the pool and
+    ``pool_maxsize`` the number of sockets kept open per host.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=False,
+        backoff_factor=0.3,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = user_agent or default_user_agent()
+    return session
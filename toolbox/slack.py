@@ -0,0 +1,315 @@
+"""Rate-limit-aware Slack delivery shared by the summary skills.
+
+Digest items are packed into as few Block Kit messages as the payload limits
+allow and sent over one pooled session. Every channel has a token bucket
+shared by all clients in the process, and a ``429`` pauses that channel's
+bucket for ``Retry-After`` seconds before the request is retried.
+
+:class:`SlackDispatcher` queues messages from concurrently running skills
+with one worker per channel, so callers never block on another skill's
+backoff. A PDF is uploaded once per content hash and set of channels, so
+retries and repeated deliveries within a run do not re-upload it.
+
+Either a bot token (``slack_bot_token``) or an incoming webhook
+(``slack_webhook_url``) is used; file uploads need the bot token.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+import requests
+
+from toolbox import profiling
+from toolbox.session import build_session
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://slack.com/api"
+
+MAX_BLOCKS = 50
+MAX_SECTION_TEXT = 3000
+MAX_TITLE = 300
+# Slack rejects large block payloads before the documented 50-block limit.
+MAX_PAYLOAD_CHARS = 36_000
+
+# chat.postMessage allows about one message per second per channel.
+CHANNEL_RATE = 1.0
+CHANNEL_BURST = 3
+
+
+class SlackError(RuntimeError):
+    """A Slack API call failed or kept being rate limited."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket with an externally imposed pause."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for ``seconds``, e.g. after a ``429``."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def channel_bucket(channel: str) -> TokenBucket:
+    """Return the process-wide bucket for ``channel`` (or webhook URL)."""
+    with _buckets_lock:
+        bucket = _buckets.get(channel)
+        if bucket is None:
+            bucket = _buckets[channel] = TokenBucket(CHANNEL_RATE, CHANNEL_BURST)
+        return bucket
+
+
+_PARTIAL_ENTITY = re.compile(r"&[a-z]*$")
+
+
+def escape(text: str) -> str:
+    """Escape the characters Slack mrkdwn treats as control sequences."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _link_url(url: str) -> str:
+    # these would end the <url|text> markup early
+    return url.replace("<", "%3C").replace(">", "%3E").replace("|", "%7C")
+
+
+def item_blocks(title: str, link: str, summary: str, context: str = "") -> list[dict[str, Any]]:
+    """Return the blocks for one digest item; only the summary is ever cut."""
+    if len(title) > MAX_TITLE:
+        title = title[: MAX_TITLE - 1] + "…"
+    heading = f"*<{_link_url(link)}|{escape(title)}>*\n"
+    summary = escape(summary)
+    room = MAX_SECTION_TEXT - len(heading)
+    if len(summary) > room:
+        summary = _PARTIAL_ENTITY.sub("", summary[: room - 1]) + "…"
+    blocks: list[dict[str, Any]] = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": heading + summary}}
+    ]
+    if context:
+        blocks.append({"type": "context", "elements": [{"type": "mrkdwn", "text": escape(context)}]})
+    return blocks
+
+
+def batch_blocks(
+    items: Iterable[list[dict[str, Any]]], header: list[dict[str, Any]] | None = None
+) -> list[list[dict[str, Any]]]:
+    """Pack per-item block groups into messages within Slack's limits.
+
+    An item's blocks are never split across messages; ``header`` starts the
+    first message only.
+    """
+    messages: list[list[dict[str, Any]]] = []
+    current = list(header or [])
+    size = len(json.dumps(current, ensure_ascii=False))
+    for group in items:
+        group_size = len(json.dumps(group, ensure_ascii=False))
+        if current and (
+            len(current) + len(group) > MAX_BLOCKS or size + group_size > MAX_PAYLOAD_CHARS
+        ):
+            messages.append(current)
+            current, size = [], 2
+        current.extend(group)
+        size += group_size
+    if current:
+        messages.append(current)
+    return messages
+
+
+class SlackClient:
+    """Minimal Slack Web API / webhook client with 429 handling."""
+
+    def __init__(
+        self,
+        token: str | None = None,
+        webhook_url: str | None = None,
+        *,
+        session: requests.Session | None = None,
+        base_url: str = API_URL,
+        max_retries: int = 5,
+        timeout: float = 30.0,
+    ) -> None:
+        if not token and not webhook_url:
+            raise ValueError("either a bot token or a webhook URL is required")
+        self.token = token
+        self.webhook_url = webhook_url
+        self.session = session or build_session()
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._uploads: dict[tuple[str, str], str] = {}
+        self._uploads_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Mapping[str, Any], **kwargs: Any) -> SlackClient:
+        """Build a client from a skill's settings (see :func:`toolbox.config.skill_settings`)."""
+        return cls(settings.get("slack_bot_token"), settings.get("slack_webhook_url"), **kwargs)
+
+    def _send(self, bucket: TokenBucket, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send one request through ``bucket``, honouring ``Retry-After``."""
+        for _ in range(self.max_retries + 1):
+            bucket.acquire()
+            with profiling.timed("slack.request"):
+                resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            if resp.status_code != 429:
+                resp.raise_for_status()
+                return resp
+            delay = float(resp.headers.get("Retry-After", 1))
+            logger.info("slack rate limited on %s, retrying in %.1fs", url, delay)
+            bucket.pause(delay)
+        raise SlackError(f"still rate limited after {self.max_retries} retries: {url}")
+
+    def api(self, method: str, bucket_key: str | None = None, **params: Any) -> dict[str, Any]:
+        """Call a Web API method and return its JSON, raising on ``ok: false``."""
+        if not self.token:
+            raise SlackError(f"{method} needs slack_bot_token")
+        bucket = channel_bucket(bucket_key or f"method:{method}")
+        headers = {"Authorization": f"Bearer {self.token}"}
+        if method == "chat.postMessage":
+            kwargs: dict[str, Any] = {"json": params}
+        else:
+            kwargs = {"data": params}
+        resp = self._send(bucket, "POST", f"{self.base_url}/{method}", headers=headers, **kwargs)
+        body = resp.json()
+        if not body.get("ok"):
+            raise SlackError(f"{method} failed: {body.get('error', 'unknown error')}")
+        return body
+
+    def post_message(self, channel: str | None, blocks: list[dict[str, Any]], text: str) -> None:
+        """Post one message; ``channel`` is ignored for webhooks."""
+        if self.token:
+            self.api("chat.postMessage", channel, channel=channel, blocks=blocks, text=text)
+            return
+        bucket = channel_bucket(self.webhook_url)
+        self._send(bucket, "POST", self.webhook_url, json={"blocks": blocks, "text": text})
+
+    def upload_file(
+        self,
+        path: str | Path,
+        channels: str | Iterable[str],
+        *,
+        title: str | None = None,
+        comment: str | None = None,
+    ) -> str:
+        """Upload ``path`` to ``channels`` unless already done; returns the file id."""
+        path = Path(path)
+        data = path.read_bytes()
+        channels = [channels] if isinstance(channels, str) else sorted(channels)
+        key = (hashlib.sha256(data).hexdigest(), ",".join(channels))
+        with self._uploads_lock:
+            file_id = self._uploads.get(key)
+            if file_id is not None:
+                logger.info("%s already uploaded as %s, skipping", path.name, file_id)
+                return file_id
+            ticket = self.api("files.getUploadURLExternal", filename=path.name, length=len(data))
+            self._send(channel_bucket("files.upload"), "POST", ticket["upload_url"], data=data)
+            params: dict[str, Any] = {
+                "files": json.dumps([{"id": ticket["file_id"], "title": title or path.name}]),
+                "channels": ",".join(channels),
+            }
+            if comment:
+                params["initial_comment"] = comment
+            self.api("files.completeUploadExternal", **params)
+            self._uploads[key] = ticket["file_id"]
+        return ticket["file_id"]
+
+
+class SlackDispatcher:
+    """Per-channel send queues shared by skills running in one process."""
+
+    def __init__(self) -> None:
+        self._queues: dict[str, queue.Queue] = {}
+        self._workers: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def _worker(self, q: queue.Queue) -> None:
+        while True:
+            job = q.get()
+            if job is None:
+                return
+            future, client, channel, blocks, text = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(client.post_message(channel, blocks, text))
+                except Exception as exc:  # surfaced through the future
+                    future.set_exception(exc)
+
+    def submit(
+        self, client: SlackClient, channel: str | None, blocks: list[dict[str, Any]], text: str
+    ) -> Future:
+        """Queue a message; messages to one channel are sent in order."""
+        key = channel if client.token else client.webhook_url
+        future: Future = Future()
+        with self._lock:
+            q = self._queues.get(key)
+            if q is None:
+                q = self._queues[key] = queue.Queue()
+                worker = threading.Thread(target=self._worker, args=(q,), name=f"slack-{key}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        q.put((future, client, channel, blocks, text))
+        return future
+
+    def post_digest(
+        self,
+        client: SlackClient,
+        channel: str | None,
+        title: str,
+        items: Iterable[list[dict[str, Any]]],
+    ) -> list[Future]:
+        """Batch ``items`` (see :func:`item_blocks`) under a header and queue them."""
+        header = [{"type": "header", "text": {"type": "plain_text", "text": title[:150]}}]
+        messages = batch_blocks(items, header)
+        return [
+            self.submit(client, channel, blocks, f"{title} ({i}/{len(messages)})")
+            for i, blocks in enumerate(messages, 1)
+        ]
+
+    def close(self) -> None:
+        """Wait for queued messages to be sent and stop the workers."""
+        with self._lock:
+            for q in self._queues.values():
+                q.put(None)
+            workers, self._workers, self._queues = self._workers, [], {}
+        for worker in workers:
+            worker.join()
+
+    def __enter__(self) -> SlackDispatcher:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()